@@ -1254,7 +1254,8 @@ def _is_under_any(target: Path, parents: list[Path]) -> bool:
 def _safe_write_json(p: Path, obj: dict[str, Any]) -> None:
     from shared.atomic_write import atomic_write_json
 
-    atomic_write_json(p, obj)
+    # 只写对话目录下的文件（对话/settings/variables），仅由程序读取：紧凑格式
+    atomic_write_json(p, obj, pretty=False)
 
 
 def _sanitize_filename(name: str) -> str:
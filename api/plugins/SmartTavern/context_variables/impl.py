@@ -68,7 +68,8 @@ def _write_json(path: Path, obj: Any) -> bool:
     try:
         from shared.atomic_write import atomic_write_json
 
-        atomic_write_json(path, obj if obj is not None else {})
+        # context_variables.json 位于对话目录下，仅由程序读取：紧凑格式
+        atomic_write_json(path, obj if obj is not None else {}, pretty=False)
         return True
     except Exception:
         return False
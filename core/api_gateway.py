@@ -7,10 +7,12 @@ API网关模块（核心层 - core）
 """
 
 import asyncio
+import concurrent.futures
 import functools
 import inspect
 import json
 import logging
+import os
 import sys
 import threading
 from collections.abc import Callable
@@ -308,6 +310,8 @@ class APIGateway:
         self.websocket_connections = []
         self._server_thread = None
         self._server = None
+        # run_startup_in_background 设置：后台启动步骤完成时 resolve 的 future
+        self._startup_future: concurrent.futures.Future | None = None
 
         # 加载配置
         self._load_config(config, config_file, project_config)
@@ -416,8 +420,33 @@ class APIGateway:
             allow_headers=["*"],
         )
 
+        # 启动时调整同步 API 所用的线程池上限
+        self.app.add_event_handler("startup", self._tune_thread_pools)
+
         logger.info("✓ FastAPI应用初始化完成")
 
+    async def _tune_thread_pools(self):
+        """按 MF_THREAD_LIMIT（默认 200）放宽同步调用的线程上限。
+
+        同步 API 经事件循环的默认 executor 执行（默认仅 min(32, CPU+4) 个线程），
+        Starlette 的同步路由/文件响应则受 anyio 默认 40 个令牌的限流；并发较高时两者都会排队。
+        """
+        try:
+            limit = int(os.getenv("MF_THREAD_LIMIT", "200"))
+        except ValueError:
+            limit = 200
+        if limit <= 0:
+            return
+        asyncio.get_running_loop().set_default_executor(
+            concurrent.futures.ThreadPoolExecutor(max_workers=limit, thread_name_prefix="mf-api")
+        )
+        try:
+            import anyio.to_thread
+
+            anyio.to_thread.current_default_thread_limiter().total_tokens = limit
+        except ImportError:
+            pass
+
     def _setup_default_middlewares(self):
         """设置默认中间件"""
         # 基础中间件
@@ -808,14 +837,51 @@ class APIGateway:
 
         logger.info("✓ SPA fallback 路由已注册")
 
+    def run_startup_in_background(self, init: Callable[[], Any], timeout: float = 300.0):
+        """在后台线程执行耗时的启动步骤（如插件 hook 初始化），让端口尽早开始监听。
+
+        就绪前，除健康检查外的 API 请求会等待其完成，超过 *timeout* 秒返回 503；
+        健康检查与非 API 路径（静态文件、文档）不受影响。须在服务器启动前调用。
+        """
+        if not self.app or not self.config:
+            init()
+            return
+
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._startup_future = future
+        api_prefix = f"{self.config.api_prefix}/"
+        health_path = f"{self.config.api_prefix}/health"
+
+        def run():
+            try:
+                init()
+            except Exception as e:
+                logger.error(f"❌ 后台启动步骤失败: {e}")
+            finally:
+                future.set_result(None)
+
+        async def readiness_middleware(request: Request, call_next):
+            path = request.url.path
+            if not future.done() and path.startswith(api_prefix) and path != health_path:
+                try:
+                    # shield：单个请求超时不应取消共享的就绪 future
+                    await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+                except asyncio.TimeoutError:
+                    return JSONResponse(status_code=503, content={"error": "startup timeout"})
+            return await call_next(request)
+
+        self.app.middleware("http")(readiness_middleware)
+        threading.Thread(target=run, name="gateway-startup", daemon=True).start()
+
     def start_server(self, background: bool = False):
         """启动API服务器"""
         if not self.app or not self.config:
             logger.error("❌ FastAPI未初始化或配置缺失，无法启动服务器")
             return
 
-        # 确保插件已初始化（幂等，若 _bootstrap_gateway 已调用则跳过）
-        core.get_service_manager().initialize_plugins()
+        # 确保插件已初始化（幂等，若 _bootstrap_gateway 已调用则跳过；已交给后台启动步骤时不在此阻塞）
+        if self._startup_future is None:
+            core.get_service_manager().initialize_plugins()
 
         # 完成所有设置
         self.discover_and_register_functions()
@@ -834,7 +900,8 @@ class APIGateway:
                         self.app, host=self.config.host, port=self.config.port, log_level="info", access_log=True
                     )
                     self._server = uvicorn.Server(config)
-                    asyncio.run(self._server.serve())
+                    # Server.run 会按配置选择事件循环（已安装 uvloop 时使用之），直接 asyncio.run 则总是默认循环
+                    self._server.run()
                 except Exception as e:
                     logger.error(f"❌ API服务器运行异常: {e}")
 
@@ -11,6 +11,7 @@
 - path-only 查找仅在唯一匹配时返回，多匹配时抛出 ValueError
 """
 
+import threading
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from typing import Any
@@ -41,6 +42,8 @@ class FunctionRegistry:
         # path -> list of (ns, path) keys — 用于 path-only 兼容查找
         self._path_index: dict[str, list[tuple[str, str]]] = {}
         self.workflows: dict[str, Callable] = {}
+        # 模块可能被并行导入（MF_IMPORT_WORKERS），冲突检查与写入需原子完成
+        self._register_lock = threading.Lock()
 
     def _derive_namespace(self, func: Callable) -> str:
         mod = getattr(func, "__module__", "") or ""
@@ -69,9 +72,6 @@ class FunctionRegistry:
         ns = self._derive_namespace(func)
         key = (ns, path)
 
-        if key in self.functions:
-            raise ValueError(f"API key 冲突: ({ns}, {path}) 已被注册。已有: {self.specs[key]}")
-
         if not isinstance(input_schema, dict) or not isinstance(output_schema, dict):
             raise ValueError("input_schema / output_schema 必须为字典(JSON Schema)")
 
@@ -86,9 +86,12 @@ class FunctionRegistry:
             methods=[m.upper() for m in (methods or ["GET", "POST"])],
         )
 
-        self.functions[key] = func
-        self.specs[key] = spec
-        self._path_index.setdefault(path, []).append(key)
+        with self._register_lock:
+            if key in self.functions:
+                raise ValueError(f"API key 冲突: ({ns}, {path}) 已被注册。已有: {self.specs[key]}")
+            self.functions[key] = func
+            self.specs[key] = spec
+            self._path_index.setdefault(path, []).append(key)
 
         try:
             print(f"✓ 已注册API: {spec}")
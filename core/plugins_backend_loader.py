@@ -33,10 +33,13 @@
 """
 
 import importlib
-import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 
+from shared import fast_json
+
 
 @dataclass
 class LoaderResult:
@@ -51,21 +54,18 @@ class PluginsBackendLoader:
         here = Path(__file__).resolve()
         core_dir = here.parent
         self.repo_root = repo_root or core_dir.parent
+        # 仓库内 api/ 目录的已解析绝对路径前缀（带末尾分隔符），用于字符串前缀判断与模块名切片
+        self._root_prefix = os.path.join(str(self.repo_root.resolve()), "")
+        self._api_prefix = os.path.join(self._root_prefix + "api", "")
 
     def _plugins_root(self, project: str) -> Path:
         return self.repo_root / "backend_projects" / project / "plugins"
 
-    def _is_under(self, path: Path, base: Path) -> bool:
-        try:
-            _ = path.resolve().relative_to(base.resolve())
-            return True
-        except Exception:
-            return False
-
     def _read_manifest(self, manifest_path: Path) -> dict | None:
         try:
-            with open(manifest_path, encoding="utf-8") as f:
-                return json.load(f)
+            with open(manifest_path, "rb") as f:
+                raw = f.read()
+            return fast_json.loads(raw)
         except Exception:
             return None
 
@@ -121,40 +121,25 @@ class PluginsBackendLoader:
         f:/repo/api/plugins/smarttavern/example_backend/example_backend.py
         -> api.plugins.smarttavern.example_backend.example_backend
         """
-        if not file_path.exists() or not file_path.is_file():
-            return None
-        if not self._is_under(file_path, self.repo_root):
+        if not file_path.is_file():
             return None
-        rel = file_path.resolve().relative_to(self.repo_root.resolve())
-        # 仅允许 api/* 下的文件
-        parts = list(rel.parts)
-        if not parts or parts[0] != "api":
+        # 仅允许 api/* 下的文件：对已解析路径做一次前缀判断，再切片去后缀、分隔符转点号
+        path_str = str(file_path.resolve())
+        if not path_str.startswith(self._api_prefix):
             return None
-        # 去除 .py 后缀并转点号
-        without_suffix = file_path.with_suffix("")
-        rel2 = without_suffix.resolve().relative_to(self.repo_root.resolve())
-        module = ".".join(rel2.parts)
-        return module
+        return os.path.splitext(path_str[len(self._root_prefix) :])[0].replace(os.sep, ".")
 
     def _impl_module_for_dir(self, dir_path: Path) -> str | None:
         """
         对“目录级”入口，寻找同名实现文件：
         .../<dir_name>/<dir_name>.py 存在时，返回对应导入路径
         """
-        if not dir_path.exists() or not dir_path.is_dir():
-            return None
-        # 必须在 repo_root 下
-        if not self._is_under(dir_path, self.repo_root):
+        if not dir_path.is_dir():
             return None
-        # 必须在 api/* 下
-        rel = dir_path.resolve().relative_to(self.repo_root.resolve())
-        parts = list(rel.parts)
-        if not parts or parts[0] != "api":
+        # 必须在 repo_root 的 api/* 下
+        if not os.path.join(str(dir_path.resolve()), "").startswith(self._api_prefix):
             return None
-        impl_file = dir_path / f"{dir_path.name}.py"
-        if not impl_file.exists() or not impl_file.is_file():
-            return None
-        return self._to_module_path_from_file(impl_file)
+        return self._to_module_path_from_file(dir_path / f"{dir_path.name}.py")
 
     def _resolve_entry_to_modules(self, entry: str, plugin_root: Path) -> list[str]:
         """
@@ -213,12 +198,13 @@ class PluginsBackendLoader:
                 skipped.append((mod, f"导入失败: {type(e).__name__}: {e}"))
         return imported, skipped
 
-    def load(self, project: str = "SmartTavern", manifest_only: bool = True) -> LoaderResult:
+    def load(self, project: str = "SmartTavern", manifest_only: bool = True, max_workers: int = 1) -> LoaderResult:
         """
         执行按 manifest.json 的选择性加载。
         - manifest_only=True：仅加载声明的 backend_entries；未声明则跳过
         - manifest_only=False：若未声明 backend_entries，则尝试回退：
           - 自动扫描 api/plugins/<project>/<plugin-id> 目录，并导入同名实现文件（如果存在）
+        - max_workers > 1 时用线程池并发读取各 manifest.json（纯 I/O）；导入仍按发现顺序串行进行
         """
         plugins_root = self._plugins_root(project)
         imported_modules: list[str] = []
@@ -228,16 +214,25 @@ class PluginsBackendLoader:
         if not plugins_root.exists() or not plugins_root.is_dir():
             return LoaderResult(imported_modules, skipped_entries, manifests_read)
 
-        for manifest in plugins_root.rglob("manifest.json"):
-            plugin_root = manifest.parent
-            # 仅遍历直接位于插件子目录的 manifest（避免递归到非插件子目录）
-            # 通过检查相对路径深度简单限制：backend_projects/<Project>/plugins/<plugin>[/...]/manifest.json
-            rel = manifest.resolve().relative_to(plugins_root.resolve())
-            if len(rel.parts) < 2:
-                # 必须至少为 <plugin>/manifest.json
-                continue
+        # 仅遍历直接位于插件子目录的 manifest（避免递归到非插件子目录）
+        # 通过检查相对路径深度简单限制：backend_projects/<Project>/plugins/<plugin>[/...]/manifest.json
+        # 必须至少为 <plugin>/manifest.json
+        root_resolved = plugins_root.resolve()
+        manifests = [
+            m for m in plugins_root.rglob("manifest.json") if len(m.resolve().relative_to(root_resolved).parts) >= 2
+        ]
+
+        # 先（可并发）读取全部 manifest，再按发现顺序逐个处理
+        if max_workers > 1 and len(manifests) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(max_workers, len(manifests)), thread_name_prefix="plugin-manifest"
+            ) as ex:
+                manifest_data = list(ex.map(self._read_manifest, manifests))
+        else:
+            manifest_data = [self._read_manifest(m) for m in manifests]
 
-            data = self._read_manifest(manifest)
+        for manifest, data in zip(manifests, manifest_data, strict=True):
+            plugin_root = manifest.parent
             manifests_read += 1
 
             entries = self._extract_backend_entries(data)
@@ -279,6 +274,8 @@ class PluginsBackendLoader:
 
 
 # 便捷函数
-def load_backend_plugin_apis(manifest_only: bool = True, project: str = "SmartTavern") -> LoaderResult:
+def load_backend_plugin_apis(
+    manifest_only: bool = True, project: str = "SmartTavern", max_workers: int = 1
+) -> LoaderResult:
     loader = PluginsBackendLoader()
-    return loader.load(project=project, manifest_only=manifest_only)
+    return loader.load(project=project, manifest_only=manifest_only, max_workers=max_workers)
@@ -8,12 +8,96 @@
 """
 
 import importlib
+import importlib.util
+import os
+import sys
 import threading
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from importlib.machinery import PathFinder
 from pathlib import Path
 from typing import Any
 
+# 模块发现时整体跳过的目录（在目录层面剪枝，不再进入其子树）
+_SKIP_DIRS = frozenset({"test", "tests", "example", "examples", "__pycache__", "node_modules"})
+
+# 扫描的 api/ 子目录（按此顺序）
+_API_SUBDIRS = ("modules", "workflow", "plugins")
+
+
+def _scan_py_modules(dir_path: str, pkg: str):
+    """递归扫描 *dir_path* 下的 .py 文件，产出 (点式模块路径, 所在目录名) 二元组。
+
+    使用 os.scandir（DirEntry 自带 d_type 缓存），并在进入子目录前按 _SKIP_DIRS 剪枝。
+    目录名即模块的服务名（api.modules.foo.foo → foo），在扫描时顺带得到，无需再 split。
+    """
+    dir_name = pkg.rpartition(".")[2]
+    try:
+        with os.scandir(dir_path) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for entry in entries:
+        name = entry.name
+        if entry.is_dir(follow_symlinks=False):
+            # Like __*.py files, __*-named directories (e.g. __pycache__) are never modules;
+            # dot-named ones (.git, .venv) are not importable packages at all
+            if name not in _SKIP_DIRS and not name.startswith(("__", ".")):
+                yield from _scan_py_modules(entry.path, f"{pkg}.{name}")
+        elif name.endswith(".py") and not name.startswith("__"):
+            yield f"{pkg}.{name[:-3]}", dir_name
+
+
+def _present_api_subdirs(api_root: str) -> tuple[str, ...]:
+    """一次 scandir 列出 api/ 下实际存在的 _API_SUBDIRS（保持 _API_SUBDIRS 顺序）。"""
+    try:
+        with os.scandir(api_root) as it:
+            found = {e.name for e in it if e.name in _API_SUBDIRS and e.is_dir(follow_symlinks=False)}
+    except (FileNotFoundError, NotADirectoryError):
+        return ()
+    return tuple(sub for sub in _API_SUBDIRS if sub in found)
+
+
+def _import_api_module(module_path: str, direct: bool = False) -> Any:
+    """导入一个 API 模块。
+
+    *direct* 为 True 时（仅限串行导入），父包已导入后直接在其 __path__ 上用 PathFinder 查找并执行，
+    跳过 import_module 对 sys.meta_path 上各 finder 的逐个询问；它不经过全局导入锁，故并行导入时不用。
+    """
+    parent_name, _, child = module_path.rpartition(".")
+    parent = importlib.import_module(parent_name)
+    search_path = getattr(parent, "__path__", None)
+    if search_path is None or not direct:
+        return importlib.import_module(module_path)
+
+    module = sys.modules.get(module_path)
+    if module is not None:
+        return module
+    spec = PathFinder.find_spec(module_path, search_path)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {module_path!r}", name=module_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_path] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(module_path, None)
+        raise
+    setattr(parent, child, module)
+    return module
+
+
+def _import_workers() -> int:
+    """MF_IMPORT_WORKERS > 1 时用线程池并行导入 API 模块（默认串行）。
+
+    导入中的文件读取/stat 会释放 GIL，模块多时可重叠 I/O；但 API 注册顺序随之不固定，故默认关闭。
+    """
+    try:
+        return int(os.getenv("MF_IMPORT_WORKERS", "0"))
+    except ValueError:
+        return 0
+
 
 @dataclass
 class ServiceRegistry:
@@ -58,6 +142,10 @@ class UnifiedServiceManager:
         self._base_path = Path.cwd()
         self._verbose = False
         self._plugins_initialized = False
+        # load_project_modules 首次完整执行后的加载数；之后的调用（如 --reload 的 create_app 再次引导）直接返回它
+        self._modules_loaded: int | None = None
+        # 插件初始化可能在后台线程进行（见 APIGateway.run_startup_in_background），与同步调用互斥
+        self._plugins_lock = threading.Lock()
 
     # ========== 动态模块发现与加载 ==========
 
@@ -67,67 +155,90 @@ class UnifiedServiceManager:
 
         规则：
         - 遍历 api/modules、api/workflow、api/plugins 三个目录
-        - 收集所有 .py 文件（跳过 __*.py、test*/example* 目录）
+        - 收集所有 .py 文件（跳过 __*.py；test/tests/example/examples 及 __* 目录整体剪枝）
         - 先确保父包已在 sys.modules 中（导入其 __init__.py）
         """
-        module_paths: list[str] = []
-        seen: set[str] = set()
+        return [module_path for module_path, _ in self._discover_module_entries()]
 
-        api_dirs = [
-            self._base_path / "api" / "modules",
-            self._base_path / "api" / "workflow",
-            self._base_path / "api" / "plugins",
-        ]
+    def _discover_module_entries(self, present: tuple[str, ...] | None = None) -> list[tuple[str, str]]:
+        """同 discover_modules，但同时返回每个模块的服务名（所在目录名）。
 
-        for base_dir in api_dirs:
-            if not base_dir.exists():
-                continue
-            for p in base_dir.rglob("*.py"):
-                if p.name.startswith("__"):
-                    continue
-                if any(part in ("test", "tests", "example", "examples") for part in p.parts):
-                    continue
-                rel = p.relative_to(self._base_path).with_suffix("")
-                mod = ".".join(rel.parts)
+        *present* 为已探测到的 api/ 子目录（见 _present_api_subdirs），省略时在此探测。
+        """
+        api_root = str(self._base_path / "api")
+        if present is None:
+            present = _present_api_subdirs(api_root)
+        entries: list[tuple[str, str]] = []
+        seen: set[str] = set()
+
+        for sub in present:
+            for mod, module_name in _scan_py_modules(os.path.join(api_root, sub), f"api.{sub}"):
                 if mod not in seen:
                     seen.add(mod)
-                    module_paths.append(mod)
+                    entries.append((mod, module_name))
 
-        return module_paths
+        return entries
 
     def load_project_modules(self) -> int:
         """
         加载所有模块（扫描 api/modules、api/workflow、api/plugins）。
         通过 import 导入实现文件以触发模块内的函数/工作流注册。
+        进程内只完整执行一次；再次调用时模块都已在 sys.modules 中，直接返回首次的加载数。
         """
+        if self._modules_loaded is not None:
+            return self._modules_loaded
+
+        # 一次 scandir 得到实际存在的子目录，只导入/扫描这些子包
+        present = _present_api_subdirs(str(self._base_path / "api"))
+
         # 先确保顶层包可导入
-        for pkg in ("api", "api.modules", "api.workflow", "api.plugins"):
+        for pkg in ("api", *(f"api.{sub}" for sub in present)):
             try:
                 importlib.import_module(pkg)
             except Exception:
                 pass
 
         total_loaded_count = 0
-        discovered = self.discover_modules()
+        discovered = self._discover_module_entries(present)
 
-        for module_path in discovered:
+        # 热循环内的属性查找提前绑定为局部变量
+        imp = _import_api_module
+        mods = self.services.module_services
+        log = print if self._verbose else None
+
+        paths = [module_path for module_path, _ in discovered]
+        workers = _import_workers()
+        parallel = workers > 1 and len(paths) > 1
+
+        def try_import(module_path: str) -> tuple[Any, Exception | None]:
             try:
-                module = importlib.import_module(module_path)
-                total_loaded_count += 1
-                parts = module_path.split(".")
-                module_name = parts[-2] if len(parts) >= 2 else parts[-1]
-                service_key = f"core.{module_name}"
-                self.services.module_services[service_key] = module
-                if self._verbose:
-                    print(f"  ✓ 加载模块: {service_key} ({module_path})")
+                return imp(module_path, not parallel), None
             except Exception as e:
-                print(f"  ✗ 模块加载失败 {module_path}: {type(e).__name__}: {e}")
+                return None, e
+
+        if parallel:
+            # 父包已在上方串行导入，子模块并发导入不会竞争父包初始化；结果仍按发现顺序处理
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mf-import") as ex:
+                outcomes = list(ex.map(try_import, paths))
+        else:
+            outcomes = map(try_import, paths)
+
+        for (module_path, module_name), (module, err) in zip(discovered, outcomes, strict=True):
+            if err is not None:
+                print(f"  ✗ 模块加载失败 {module_path}: {type(err).__name__}: {err}")
+                continue
+            total_loaded_count += 1
+            service_key = f"core.{module_name}"
+            mods[service_key] = module
+            if log:
+                log(f"  ✓ 加载模块: {service_key} ({module_path})")
 
+        self._modules_loaded = total_loaded_count
         return total_loaded_count
 
     def initialize_plugins(self) -> int:
         """
-        初始化后端插件系统（幂等：多次调用只执行一次）
+        初始化后端插件系统（幂等：多次调用只执行一次；并发调用时后到者等待先到者完成）
 
         自动加载所有启用的插件及其 Hook
 
@@ -136,7 +247,12 @@ class UnifiedServiceManager:
         """
         if self._plugins_initialized:
             return 0
+        with self._plugins_lock:
+            if self._plugins_initialized:
+                return 0
+            return self._initialize_plugins_locked()
 
+    def _initialize_plugins_locked(self) -> int:
         try:
             from api.plugins.SmartTavern import initialize_plugins
 
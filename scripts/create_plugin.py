@@ -12,13 +12,21 @@ with manifest.json, hooks.py, and optionally plugin.js.
 from __future__ import annotations
 
 import argparse
-import json
+import re
 import sys
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 PLUGINS_DIR = REPO_ROOT / "backend_projects" / "SmartTavern" / "plugins"
 
+# Ensure project root is on sys.path
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from shared import fast_json
+
+_PLUGIN_NAME_RE = re.compile(r"[a-zA-Z0-9][a-zA-Z0-9._-]*")
+
 
 MANIFEST_TEMPLATE = """\
 {{
@@ -66,6 +74,7 @@ def unregister_hooks(hook_manager: Any) -> None:
     hook_manager.unregister_strategy("{name}")
 '''
 
+
 FRONTEND_TEMPLATE = """\
 // {name} - frontend plugin
 (function () {{
@@ -84,9 +93,7 @@ def main() -> None:
     if not name:
         print("Error: plugin name must not be empty", file=sys.stderr)
         sys.exit(1)
-    import re
-
-    if not re.fullmatch(r"[a-zA-Z0-9][a-zA-Z0-9._-]*", name):
+    if not _PLUGIN_NAME_RE.fullmatch(name):
         print(
             "Error: plugin name must be alphanumeric (with hyphens/underscores/dots), no path separators",
             file=sys.stderr,
@@ -123,15 +130,12 @@ def main() -> None:
     # Add to plugins_switch.json enabled list
     switch_path = PLUGINS_DIR / "plugins_switch.json"
     if switch_path.exists():
-        switch = json.loads(switch_path.read_text(encoding="utf-8"))
+        switch = fast_json.loads(switch_path.read_bytes())
         enabled = switch.get("enabled", [])
         if name not in enabled:
             enabled.append(name)
             switch["enabled"] = enabled
-            switch_path.write_text(
-                json.dumps(switch, ensure_ascii=False, indent=2) + "\n",
-                encoding="utf-8",
-            )
+            switch_path.write_bytes(fast_json.dumps(switch, indent=True, newline=True))
             print(f"Added '{name}' to plugins_switch.json")
 
     files = [str(p.relative_to(REPO_ROOT)) for p in sorted(plugin_dir.iterdir())]
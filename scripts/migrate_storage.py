@@ -4,18 +4,26 @@
 Usage:
     python scripts/migrate_storage.py --direction json-to-sqlite [--dry-run] [--verify]
     python scripts/migrate_storage.py --direction sqlite-to-json [--dry-run] [--verify]
+    python scripts/migrate_storage.py --direction json-to-sqlite --workers 16
 
 Options:
     --direction     Migration direction: 'json-to-sqlite' or 'sqlite-to-json'
     --dry-run       Preview what would be migrated without writing
     --verify        After migration, verify data integrity by loading and comparing
     --data-root     Custom data directory (default: backend_projects/SmartTavern/data)
+    --workers       Threads used to read source conversations ahead of the writer (default: 8)
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import sys
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
 from pathlib import Path
 
 # Ensure project root is on sys.path
@@ -23,50 +31,89 @@ _project_root = Path(__file__).resolve().parents[1]
 if str(_project_root) not in sys.path:
     sys.path.insert(0, str(_project_root))
 
+from shared.storage.base import canonical_json
 from shared.storage.json_backend import JsonCatalogStore, JsonConversationStore
-from shared.storage.sqlite_backend import SqliteCatalogStore, SqliteConversationStore
+from shared.storage.sqlite_backend import (
+    SqliteCatalogStore,
+    SqliteConversationStore,
+    get_shared_conn,
+)
 
 ENTITY_TYPES = ["presets", "world_books", "characters", "personas", "regex_rules", "llm_configs"]
 
 
+def _run_migration(rows: Iterable, write: Callable | None) -> int:
+    """Shared migration loop: hand each row to *write* (``None`` for dry-run) and count them."""
+    count = 0
+    for row in rows:
+        if write is not None:
+            write(row)
+        count += 1
+    return count
+
+
 def migrate_catalog(src_catalog, dst_catalog, *, dry_run: bool = False) -> dict[str, int]:
     stats: dict[str, int] = {}
-    for et in ENTITY_TYPES:
-        items = src_catalog.list_items(et)
-        count = 0
-        for item in items:
-            folder_name = item.get("folder_name", item["name"])
-            data = src_catalog.get_item(et, folder_name)
-            if data is None:
-                continue
-            if item.get("icon_path") and "icon_path" not in data:
-                data["icon_path"] = item["icon_path"]
-            if not dry_run:
-                dst_catalog.save_item(et, folder_name, data)
-            count += 1
-        stats[et] = count
-        print(f"  {et}: {count} items {'(dry-run)' if dry_run else 'migrated'}")
+    with nullcontext() if dry_run else dst_catalog.bulk_writes():
+        for et in ENTITY_TYPES:
+            items = src_catalog.iter_items_full(et)
+            if dry_run:
+                count = _run_migration(items, None)
+            else:
+                count = dst_catalog.bulk_save_items(et, items)
+            stats[et] = count
+            print(f"  {et}: {count} items {'(dry-run)' if dry_run else 'migrated'}")
     return stats
 
 
-def migrate_conversations(src_conv, dst_conv, *, conv_ids: list[str], dry_run: bool = False) -> int:
-    count = 0
-    for cid in conv_ids:
-        doc = src_conv.load_doc(cid)
-        settings = src_conv.load_settings(cid)
-        variables = src_conv.load_variables(cid)
-
-        if doc is None and not settings and not variables:
-            continue
-
-        if not dry_run:
-            if doc is not None:
-                dst_conv.save_doc(cid, doc)
-            if settings:
-                dst_conv.save_settings(cid, settings)
-            if variables:
-                dst_conv.save_variables(cid, variables)
-        count += 1
+def _load_conversation(src_conv, cid: str) -> tuple:
+    return cid, src_conv.load_doc(cid), src_conv.load_settings(cid), src_conv.load_variables(cid)
+
+
+def prefetch_docs(src_conv, cids: list[str], workers: int = 8) -> Iterator[tuple]:
+    """Yield ``(cid, doc, settings, variables)`` in *cids* order, reading ahead on a thread pool.
+
+    At most ``workers * 4`` conversations are in flight, so memory stays bounded
+    while the consumer (a single writer/transaction) drains results in order.
+    """
+    if workers <= 1:
+        for cid in cids:
+            yield _load_conversation(src_conv, cid)
+        return
+    window = workers * 4
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="migrate-read") as ex:
+        it = iter(cids)
+        pending = deque(ex.submit(_load_conversation, src_conv, cid) for cid in islice(it, window))
+        while pending:
+            result = pending.popleft().result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append(ex.submit(_load_conversation, src_conv, nxt))
+            yield result
+
+
+def _conversation_writer(dst_conv) -> Callable[[tuple], None]:
+    # Bind the bound methods once so the per-conversation call avoids attribute lookups
+    save_doc = dst_conv.save_doc
+    save_settings = dst_conv.save_settings
+    save_variables = dst_conv.save_variables
+
+    def write(row: tuple) -> None:
+        cid, doc, settings, variables = row
+        if doc is not None:
+            save_doc(cid, doc)
+        if settings:
+            save_settings(cid, settings)
+        if variables:
+            save_variables(cid, variables)
+
+    return write
+
+
+def migrate_conversations(src_conv, dst_conv, *, conv_ids: list[str], dry_run: bool = False, workers: int = 8) -> int:
+    rows = (r for r in prefetch_docs(src_conv, conv_ids, workers) if r[1] is not None or r[2] or r[3])
+    with nullcontext() if dry_run else dst_conv.bulk_writes():
+        count = _run_migration(rows, None if dry_run else _conversation_writer(dst_conv))
     print(f"  conversations: {count} {'(dry-run)' if dry_run else 'migrated'}")
     return count
 
@@ -83,19 +130,19 @@ def list_conversation_ids_from_json(data_root: Path) -> list[str]:
     return ids
 
 
-def list_conversation_ids_from_sqlite(db_path: Path) -> list[str]:
-    import sqlite3
-
+def list_conversation_ids_from_sqlite(db_path: Path, *, read_only: bool = False) -> list[str]:
     if not db_path.exists():
         return []
-    conn = sqlite3.connect(str(db_path))
     try:
-        rows = conn.execute("SELECT id FROM conversations ORDER BY id").fetchall()
-        return [r[0] for r in rows]
+        rows = get_shared_conn(db_path, read_only=read_only).execute("SELECT id FROM conversations ORDER BY id")
+        return [r[0] for r in rows.fetchall()]
     except Exception:
         return []
-    finally:
-        conn.close()
+
+
+def _digest(obj) -> bytes:
+    """SHA-256 of the canonical (sorted-key, compact) JSON form of *obj*."""
+    return hashlib.sha256(canonical_json(obj)).digest()
 
 
 def verify_catalog(src_catalog, dst_catalog) -> list[str]:
@@ -109,76 +156,91 @@ def verify_catalog(src_catalog, dst_catalog) -> list[str]:
         for name in src_items & dst_items:
             src_data = src_catalog.get_item(et, name)
             dst_data = dst_catalog.get_item(et, name)
-            if src_data != dst_data:
+            if _digest(src_data) != _digest(dst_data):
                 errors.append(f"{et}/{name}: data mismatch")
     return errors
 
 
+_NODE_CORE_FIELDS = ("pid", "role", "content")
+
+
+def _diff_conversation_docs(cid: str, src_doc: dict, dst_doc: dict) -> list[str]:
+    """Field-by-field comparison, used only once the canonical bytes differ."""
+    errors = []
+    src_roots = src_doc.get("roots") or []
+    dst_roots = dst_doc.get("roots") or []
+    if src_roots != dst_roots:
+        errors.append(f"conversation {cid}: roots mismatch")
+    src_ap = src_doc.get("active_path") or []
+    dst_ap = dst_doc.get("active_path") or []
+    if src_ap != dst_ap:
+        errors.append(f"conversation {cid}: active_path mismatch")
+
+    # Verify metadata fields
+    for field in ("name", "description", "updated_at"):
+        sv = src_doc.get(field)
+        dv = dst_doc.get(field)
+        if sv != dv:
+            errors.append(f"conversation {cid}: {field} mismatch (src={sv!r}, dst={dv!r})")
+
+    # Verify node keys
+    src_nodes = src_doc.get("nodes") or {}
+    dst_nodes = dst_doc.get("nodes") or {}
+    if set(src_nodes.keys()) != set(dst_nodes.keys()):
+        errors.append(f"conversation {cid}: node keys mismatch (src={len(src_nodes)}, dst={len(dst_nodes)})")
+    else:
+        # Verify each node's content, role, pid, and metadata
+        for nid, sn in src_nodes.items():
+            dn = dst_nodes[nid]
+            if sn == dn:
+                continue
+            s_core = (sn.get("pid"), sn.get("role"), sn.get("content"))
+            d_core = (dn.get("pid"), dn.get("role"), dn.get("content"))
+            if s_core != d_core:
+                for field, sv, dv in zip(_NODE_CORE_FIELDS, s_core, d_core, strict=True):
+                    if sv != dv:
+                        errors.append(f"conversation {cid}/node {nid}: {field} mismatch")
+            # Compare remaining fields (node metadata): key sets first, then values
+            s_keys = sn.keys() - _NODE_CORE_FIELDS
+            if s_keys != dn.keys() - _NODE_CORE_FIELDS or any(sn[k] != dn[k] for k in s_keys):
+                errors.append(f"conversation {cid}/node {nid}: metadata mismatch")
+
+    # Verify children structure and ordering
+    src_children = src_doc.get("children") or {}
+    dst_children = dst_doc.get("children") or {}
+    if set(src_children.keys()) != set(dst_children.keys()):
+        errors.append(f"conversation {cid}: children keys mismatch")
+    else:
+        for pid in src_children:
+            if src_children[pid] != dst_children[pid]:
+                errors.append(
+                    f"conversation {cid}: children[{pid}] order mismatch "
+                    f"(src={src_children[pid]}, dst={dst_children[pid]})"
+                )
+    return errors
+
+
 def verify_conversations(src_conv, dst_conv, conv_ids: list[str]) -> list[str]:
     errors = []
     for cid in conv_ids:
-        src_doc = src_conv.load_doc(cid)
-        dst_doc = dst_conv.load_doc(cid)
-        if src_doc is not None and dst_doc is None:
-            errors.append(f"conversation {cid}: missing in destination")
-            continue
-        if src_doc is not None:
-            src_roots = src_doc.get("roots") or []
-            dst_roots = dst_doc.get("roots") or []
-            if src_roots != dst_roots:
-                errors.append(f"conversation {cid}: roots mismatch")
-            src_ap = src_doc.get("active_path") or []
-            dst_ap = dst_doc.get("active_path") or []
-            if src_ap != dst_ap:
-                errors.append(f"conversation {cid}: active_path mismatch")
-
-            # Verify metadata fields
-            for field in ("name", "description", "updated_at"):
-                sv = src_doc.get(field)
-                dv = dst_doc.get(field)
-                if sv != dv:
-                    errors.append(f"conversation {cid}: {field} mismatch (src={sv!r}, dst={dv!r})")
-
-            # Verify node keys
-            src_nodes = src_doc.get("nodes") or {}
-            dst_nodes = dst_doc.get("nodes") or {}
-            if set(src_nodes.keys()) != set(dst_nodes.keys()):
-                errors.append(f"conversation {cid}: node keys mismatch (src={len(src_nodes)}, dst={len(dst_nodes)})")
-            else:
-                # Verify each node's content, role, pid, and metadata
-                for nid in src_nodes:
-                    sn = src_nodes[nid]
-                    dn = dst_nodes[nid]
-                    for field in ("pid", "role", "content"):
-                        if sn.get(field) != dn.get(field):
-                            errors.append(f"conversation {cid}/node {nid}: {field} mismatch")
-                    # Compare remaining fields (node metadata)
-                    s_extra = {k: v for k, v in sn.items() if k not in ("pid", "role", "content")}
-                    d_extra = {k: v for k, v in dn.items() if k not in ("pid", "role", "content")}
-                    if s_extra != d_extra:
-                        errors.append(f"conversation {cid}/node {nid}: metadata mismatch")
-
-            # Verify children structure and ordering
-            src_children = src_doc.get("children") or {}
-            dst_children = dst_doc.get("children") or {}
-            if set(src_children.keys()) != set(dst_children.keys()):
-                errors.append(f"conversation {cid}: children keys mismatch")
-            else:
-                for pid in src_children:
-                    if src_children[pid] != dst_children[pid]:
-                        errors.append(
-                            f"conversation {cid}: children[{pid}] order mismatch "
-                            f"(src={src_children[pid]}, dst={dst_children[pid]})"
-                        )
+        src_bytes = src_conv.canonical_doc_bytes(cid)
+        if src_bytes is not None:
+            dst_bytes = dst_conv.canonical_doc_bytes(cid)
+            if dst_bytes is None:
+                errors.append(f"conversation {cid}: missing in destination")
+                continue
+            # Fast path: one bytes comparison; parse both docs again only on mismatch
+            if src_bytes != dst_bytes:
+                errors += _diff_conversation_docs(cid, src_conv.load_doc(cid), dst_conv.load_doc(cid))
 
         src_settings = src_conv.load_settings(cid)
         dst_settings = dst_conv.load_settings(cid)
-        if src_settings != dst_settings:
+        if _digest(src_settings) != _digest(dst_settings):
             errors.append(f"conversation {cid}: settings mismatch")
 
         src_vars = src_conv.load_variables(cid)
         dst_vars = dst_conv.load_variables(cid)
-        if src_vars != dst_vars:
+        if _digest(src_vars) != _digest(dst_vars):
             errors.append(f"conversation {cid}: variables mismatch")
     return errors
 
@@ -191,6 +253,9 @@ def main():
     parser.add_argument(
         "--data-root", type=str, default=None, help="Custom data directory (default: backend_projects/SmartTavern/data)"
     )
+    parser.add_argument(
+        "--workers", type=int, default=8, help="Threads reading source conversations ahead of the writer (default: 8)"
+    )
     args = parser.parse_args()
 
     data_root = Path(args.data_root) if args.data_root else _project_root / "backend_projects" / "SmartTavern" / "data"
@@ -213,16 +278,18 @@ def main():
             print("Catalog entities (dry-run):")
             migrate_catalog(json_catalog, None, dry_run=True)
             print(f"\nConversations ({len(conv_ids)} found, dry-run):")
-            migrate_conversations(json_conv, None, conv_ids=conv_ids, dry_run=True)
+            migrate_conversations(json_conv, None, conv_ids=conv_ids, dry_run=True, workers=args.workers)
         else:
-            sqlite_catalog = SqliteCatalogStore(db_path)
-            sqlite_conv = SqliteConversationStore(db_path)
+            # Both stores share one tuned connection to the same database file
+            conn = get_shared_conn(db_path)
+            sqlite_catalog = SqliteCatalogStore(db_path, conn=conn)
+            sqlite_conv = SqliteConversationStore(db_path, conn=conn)
 
             print("Migrating catalog entities...")
             migrate_catalog(json_catalog, sqlite_catalog, dry_run=False)
 
             print(f"\nMigrating conversations ({len(conv_ids)} found)...")
-            migrate_conversations(json_conv, sqlite_conv, conv_ids=conv_ids, dry_run=False)
+            migrate_conversations(json_conv, sqlite_conv, conv_ids=conv_ids, dry_run=False, workers=args.workers)
 
             if args.verify:
                 print("\nVerifying...")
@@ -241,22 +308,27 @@ def main():
             print(f"ERROR: SQLite database not found: {db_path}")
             sys.exit(1)
 
-        read_only = args.dry_run
-        sqlite_catalog = SqliteCatalogStore(db_path, read_only=read_only)
-        sqlite_conv = SqliteConversationStore(db_path, read_only=read_only)
-        conv_ids = list_conversation_ids_from_sqlite(db_path)
+        if not args.dry_run:
+            # Apply pending schema upgrades once
+            SqliteCatalogStore(db_path).close()
+        # The source is only read: open it read-only and query-only. It is not opened
+        # immutable, since a running server may still be writing to it.
+        conn = get_shared_conn(db_path, read_only=True)
+        sqlite_catalog = SqliteCatalogStore(db_path, read_only=True, conn=conn)
+        sqlite_conv = SqliteConversationStore(db_path, read_only=True, conn=conn)
+        conv_ids = list_conversation_ids_from_sqlite(db_path, read_only=True)
 
         if args.dry_run:
             print("Catalog entities (dry-run):")
             migrate_catalog(sqlite_catalog, None, dry_run=True)
             print(f"\nConversations ({len(conv_ids)} found, dry-run):")
-            migrate_conversations(sqlite_conv, None, conv_ids=conv_ids, dry_run=True)
+            migrate_conversations(sqlite_conv, None, conv_ids=conv_ids, dry_run=True, workers=args.workers)
         else:
             print("Migrating catalog entities...")
             migrate_catalog(sqlite_catalog, json_catalog, dry_run=False)
 
             print(f"\nMigrating conversations ({len(conv_ids)} found)...")
-            migrate_conversations(sqlite_conv, json_conv, conv_ids=conv_ids, dry_run=False)
+            migrate_conversations(sqlite_conv, json_conv, conv_ids=conv_ids, dry_run=False, workers=args.workers)
 
             if args.verify:
                 print("\nVerifying...")
@@ -7,7 +7,6 @@
 
 from __future__ import annotations
 
-import json
 import os
 import stat
 import sys
@@ -17,19 +16,54 @@ import time
 from pathlib import Path
 from typing import Any
 
+from shared import fast_json
+
 # ---------------------------------------------------------------------------
 # Per-file thread lock (protects concurrent async handlers in the same process)
 # ---------------------------------------------------------------------------
 
-_file_locks: dict[str, threading.Lock] = {}
-_locks_guard = threading.Lock()
+# Fixed table of striped locks: bounded memory, no per-path allocation. Unrelated
+# files that hash to the same stripe merely serialize; same-file writes always do.
+_LOCK_STRIPES = 256
+_stripes = tuple(threading.Lock() for _ in range(_LOCK_STRIPES))
 
 
 def _get_file_lock(resolved: str) -> threading.Lock:
-    with _locks_guard:
-        if resolved not in _file_locks:
-            _file_locks[resolved] = threading.Lock()
-        return _file_locks[resolved]
+    return _stripes[hash(resolved) & (_LOCK_STRIPES - 1)]
+
+
+# ---------------------------------------------------------------------------
+# Per-path caches: resolved path (Path.resolve walks every parent directory)
+# and last written permission bits (saves an os.stat per write)
+# ---------------------------------------------------------------------------
+
+_PATH_CACHE_MAX = 4096
+_resolve_cache: dict[str, str] = {}
+_mode_cache: dict[str, int] = {}
+_cache_guard = threading.Lock()
+
+# Permission bits tempfile.mkstemp gives the temp file
+_MKSTEMP_MODE = 0o600
+
+
+def _cache_put(cache: dict, key: str, value: Any) -> None:
+    with _cache_guard:
+        if key not in cache and len(cache) >= _PATH_CACHE_MAX:
+            # Evict the oldest entry (dicts keep insertion order)
+            cache.pop(next(iter(cache)), None)
+        cache[key] = value
+
+
+def _resolve_cached(target: Path) -> str:
+    # Relative paths depend on the current working directory, so only absolute ones are cached
+    if not target.is_absolute():
+        return str(target.resolve())
+    key = str(target)
+    resolved = _resolve_cache.get(key)
+    if resolved is None:
+        resolved = str(target.resolve())
+        _cache_put(_resolve_cache, key, resolved)
+    return resolved
 
 
 # ---------------------------------------------------------------------------
@@ -77,6 +111,37 @@ else:
             pass
 
 
+# ---------------------------------------------------------------------------
+# Serialization
+# ---------------------------------------------------------------------------
+
+
+def _encode_json(data: Any, pretty: bool = True) -> bytes:
+    """一次性序列化为 UTF-8 bytes（含末尾换行），随后单次 write 写出。
+
+    经 shared.fast_json：安装了 orjson 时用之加速，输出与标准库一致。
+    """
+    return fast_json.dumps(data, indent=pretty, newline=True)
+
+
+# ---------------------------------------------------------------------------
+# Durability
+# ---------------------------------------------------------------------------
+
+# fdatasync (default) | fsync | none (e.g. data_root on tmpfs); unknown values behave like fsync
+ATOMIC_WRITE_DURABILITY = os.environ.get("ATOMIC_WRITE_DURABILITY", "fdatasync").strip().lower()
+
+
+def _sync_file(fd: int) -> None:
+    # The temp file's metadata is superseded by os.replace, so flushing data alone is enough
+    if ATOMIC_WRITE_DURABILITY == "none":
+        return
+    if ATOMIC_WRITE_DURABILITY == "fdatasync" and hasattr(os, "fdatasync"):
+        os.fdatasync(fd)
+    else:
+        os.fsync(fd)
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -88,20 +153,26 @@ def atomic_write_json(
     *,
     mkdir: bool = True,
     lock_timeout: float = 5.0,
+    pretty: bool = True,
 ) -> None:
     """将 JSON 原子化写入 *target*。
 
-    流程：线程锁 → advisory flock(.lock 文件) → 同目录 tempfile → json.dump → flush+fsync → os.replace。
+    流程：序列化 → 线程锁 → advisory flock(.lock 文件) → 同目录 tempfile → 写入 → flush+fdatasync → os.replace。
+    序列化在加锁前一次性完成（orjson 可用时加速），缩短持锁时间。
     锁定对象为独立的 target.lock 文件而非 target 本身，确保 os.replace 替换 inode 后锁仍有效。
     *mkdir* 为 True 时自动创建父目录。
     *lock_timeout* 为获取锁的最大等待秒数，超时 raise TimeoutError。
-    替换前会继承原文件权限（若存在），避免 mkstemp 的 0600 默认值收紧权限。
+    *pretty* 为 False 时输出紧凑 JSON（无缩进），适合只由程序读写的高频文件。
+    落盘方式由环境变量 ATOMIC_WRITE_DURABILITY 控制（fdatasync/fsync/none）。
+    替换前会继承原文件权限（若存在），避免 mkstemp 的 0600 默认值收紧权限；
+    权限位在本进程上次写入后缓存，外部 chmod 需重启进程后生效。
     """
     target = Path(target)
+    payload = _encode_json(data, pretty)
     if mkdir:
         target.parent.mkdir(parents=True, exist_ok=True)
 
-    resolved = str(target.resolve())
+    resolved = _resolve_cached(target)
     thr_lock = _get_file_lock(resolved)
 
     if not thr_lock.acquire(timeout=lock_timeout):
@@ -114,25 +185,27 @@ def atomic_write_json(
         lock_fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, 0o644)
         _flock_acquire(lock_fd, lock_timeout)
 
-        # Record original permissions of existing target
-        try:
-            orig_mode = os.stat(resolved).st_mode
-        except OSError:
-            orig_mode = None
+        # Original permissions of the target: cached from our last write, else stat it
+        mode = _mode_cache.get(resolved)
+        if mode is None:
+            try:
+                mode = stat.S_IMODE(os.stat(resolved).st_mode)
+            except OSError:
+                mode = _MKSTEMP_MODE  # new file: keep the temp file's mode
 
         # Atomic write via temp file
         fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
         try:
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-                f.write("\n")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
                 f.flush()
-                os.fsync(f.fileno())
+                _sync_file(f.fileno())
 
-            if orig_mode is not None:
-                os.chmod(tmp_path, stat.S_IMODE(orig_mode))
+            if mode != _MKSTEMP_MODE:
+                os.chmod(tmp_path, mode)
 
             os.replace(tmp_path, target)
+            _cache_put(_mode_cache, resolved, mode)
         except BaseException:
             try:
                 os.unlink(tmp_path)
@@ -0,0 +1,96 @@
+"""
+JSON 编解码（orjson 可选加速）。
+
+orjson 为可选依赖（``smarttavern[speedups]``），缺失时使用标准库 json。
+无论是否安装 orjson，写出的字节都与标准库一致（摘要依赖于此）。orjson 与标准库写法不同的情况
+一律交给标准库处理：
+- NaN/Infinity（orjson 写成 null）；
+- 标准库用科学计数法的浮点数（绝对值 < 1e-4 或 >= 1e16；orjson 写成 ``1e16``、``0.00001``，标准库为 ``1e+16``、``1e-05``）；
+- 非 str 键（orjson 按字符串排序，标准库按原值排序）；
+- dataclass/datetime 及 str/int/dict/list 的子类（标准库拒绝或另有写法）。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # 可选加速依赖；缺失时回退到标准库 json
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+# 非 str 键、dataclass/datetime、子类不由 orjson 直接序列化（无 default 时抛 TypeError，随后交给标准库）
+_ORJSON_BASE = (
+    (orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS)
+    if orjson
+    else 0
+)
+
+# orjson 输出中可能来自“与标准库写法不同的浮点数”的片段：null（NaN/Infinity）、
+# 数字后紧跟 e（指数写法）、0.0000（小数写法的极小值）。字符串内容也可能命中，此时只是多做一次检查
+_SUSPECT_RE = re.compile(rb"null|\de|0\.0000")
+
+
+def _has_divergent_float(obj: Any) -> bool:
+    """*obj* 中是否含 orjson 与标准库写法不同的浮点数（NaN/Infinity，或标准库用科学计数法的值）。"""
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, float):
+            # 与 float.__repr__ 切换科学计数法的界限一致；NaN 的比较恒为 False，同样命中
+            if o != 0 and not 1e-4 <= abs(o) < 1e16:
+                return True
+        elif isinstance(o, dict):
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple)):
+            stack.extend(o)
+    return False
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    """解析 JSON。
+
+    orjson 拒绝而标准库接受的输入（NaN、UTF-8 BOM 等）会再交给 json.loads，旧数据照常可读。
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj: Any, *, indent: bool = False, sort_keys: bool = False, newline: bool = False) -> bytes:
+    """序列化为 UTF-8 bytes（保留非 ASCII 字符）。
+
+    *indent* 为 True 时两空格缩进，否则输出紧凑 JSON；*newline* 为 True 时追加末尾换行。
+    """
+    if orjson is not None:
+        option = _ORJSON_BASE
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        try:
+            out = orjson.dumps(obj, option=option)
+        except TypeError:
+            pass
+        else:
+            # 输出中没有可疑片段时无需遍历 obj
+            if not _SUSPECT_RE.search(out) or not _has_divergent_float(obj):
+                return out
+    if indent:
+        text = json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, indent=2)
+    else:
+        text = json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":"))
+    if newline:
+        text += "\n"
+    return text.encode("utf-8")
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -10,30 +11,43 @@ from .base import CatalogStore, ConversationStore
 
 _BACKEND = os.environ.get("STORAGE_BACKEND", "json")
 
-_catalog_store: CatalogStore | None = None
-_conversation_store: ConversationStore | None = None
+# SQLite only: buffer settings/variables saves this long and write them together (0 = off)
+_WRITE_DELAY = float(os.environ.get("STORAGE_WRITE_DELAY_MS", "0")) / 1000
 
+_DEFAULT_DATA_ROOT = Path(__file__).resolve().parents[2] / "backend_projects" / "SmartTavern" / "data"
+_DEFAULT_KEY = str(_DEFAULT_DATA_ROOT)
 
-def get_catalog_store(data_root: Path | str | None = None) -> CatalogStore:
-    """Get or create the global CatalogStore singleton."""
-    global _catalog_store
-    if _catalog_store is not None:
-        return _catalog_store
+# One store per resolved data root; the lock makes first-time creation race-free
+_catalog_stores: dict[str, CatalogStore] = {}
+_conversation_stores: dict[str, ConversationStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _store_key(data_root: Path | str | None) -> str:
+    # The default root is resolved once at import; only explicit roots pay for resolve()
     if data_root is None:
-        data_root = Path(__file__).resolve().parents[2] / "backend_projects" / "SmartTavern" / "data"
-    _catalog_store = _make_catalog_store(data_root)
-    return _catalog_store
+        return _DEFAULT_KEY
+    return str(Path(data_root).resolve())
+
+
+def _get_or_create(cache: dict, key: str, factory):
+    store = cache.get(key)
+    if store is None:
+        with _stores_lock:
+            store = cache.get(key)
+            if store is None:
+                store = cache[key] = factory(key)
+    return store
+
+
+def get_catalog_store(data_root: Path | str | None = None) -> CatalogStore:
+    """Get or create the CatalogStore for *data_root* (default: SmartTavern data dir)."""
+    return _get_or_create(_catalog_stores, _store_key(data_root), _make_catalog_store)
 
 
 def get_conversation_store(data_root: Path | str | None = None) -> ConversationStore:
-    """Get or create the global ConversationStore singleton."""
-    global _conversation_store
-    if _conversation_store is not None:
-        return _conversation_store
-    if data_root is None:
-        data_root = Path(__file__).resolve().parents[2] / "backend_projects" / "SmartTavern" / "data"
-    _conversation_store = _make_conversation_store(data_root)
-    return _conversation_store
+    """Get or create the ConversationStore for *data_root* (default: SmartTavern data dir)."""
+    return _get_or_create(_conversation_stores, _store_key(data_root), _make_conversation_store)
 
 
 def _make_catalog_store(data_root: Path | str) -> CatalogStore:
@@ -54,7 +68,7 @@ def _make_conversation_store(data_root: Path | str) -> ConversationStore:
         from .sqlite_backend import SqliteConversationStore
 
         db_path = Path(data_root) / "smarttavern.db"
-        return SqliteConversationStore(db_path)
+        return SqliteConversationStore(db_path, write_delay=_WRITE_DELAY)
     if _BACKEND == "json":
         from .json_backend import JsonConversationStore
 
@@ -3,8 +3,31 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from typing import Any
 
+from shared import fast_json
+
+
+def canonical_json(obj: Any) -> bytes:
+    """Serialize *obj* to compact, sorted-key UTF-8 JSON so equal data gives equal bytes."""
+    return fast_json.dumps(obj, sort_keys=True)
+
+
+def json_loads(data: bytes | str) -> Any:
+    """Parse JSON from ``bytes`` or ``str`` (orjson when available).
+
+    Input orjson rejects but the stdlib accepts (``NaN``, a UTF-8 BOM, ...) is retried with
+    :func:`json.loads`, so documents written by older code keep loading.
+    """
+    return fast_json.loads(data)
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize *obj* to compact JSON text (non-ASCII kept as-is), for TEXT columns."""
+    return fast_json.dumps(obj).decode("utf-8")
+
 
 class CatalogStore(ABC):
     """Thin adapter for catalog entity CRUD (presets, characters, personas, etc.)."""
@@ -22,14 +45,46 @@ class CatalogStore(ABC):
     def get_item(self, entity_type: str, name: str) -> dict[str, Any] | None:
         """Return full item data or ``None`` if not found."""
 
+    def iter_items_full(self, entity_type: str) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Yield ``(folder_name, data)`` for every item of *entity_type*.
+
+        ``data`` is the full item (as from :meth:`get_item`); when the item has an
+        icon and the data carries no ``icon_path``, the summary's ``icon_path`` is
+        filled in. Backends override this to read everything in one pass.
+        """
+        for item in self.list_items(entity_type):
+            folder_name = item.get("folder_name", item["name"])
+            data = self.get_item(entity_type, folder_name)
+            if data is None:
+                continue
+            if item.get("icon_path") and "icon_path" not in data:
+                data["icon_path"] = item["icon_path"]
+            yield folder_name, data
+
     @abstractmethod
     def save_item(self, entity_type: str, name: str, data: dict[str, Any]) -> None:
         """Create or overwrite an item."""
 
+    def bulk_save_items(self, entity_type: str, rows: Iterable[tuple[str, dict[str, Any]]]) -> int:
+        """Create or overwrite many ``(name, data)`` items. Return the number written."""
+        count = 0
+        for name, data in rows:
+            self.save_item(entity_type, name, data)
+            count += 1
+        return count
+
     @abstractmethod
     def delete_item(self, entity_type: str, name: str) -> bool:
         """Delete an item. Return ``True`` if it existed."""
 
+    @contextmanager
+    def bulk_writes(self) -> Iterator[None]:
+        """Group many writes into one unit of work (e.g. a single transaction).
+
+        Default is a no-op; transactional backends commit once on exit.
+        """
+        yield
+
 
 class ConversationStore(ABC):
     """Thin adapter for conversation tree + per-conversation settings/variables."""
@@ -45,6 +100,15 @@ class ConversationStore(ABC):
     def save_doc(self, conversation_id: str, doc: dict[str, Any]) -> None:
         """Persist the full conversation document."""
 
+    def canonical_doc_bytes(self, conversation_id: str) -> bytes | None:
+        """Return :func:`canonical_json` of the conversation document, or ``None`` if it doesn't exist.
+
+        Equal documents yield equal bytes regardless of backend, so comparing two
+        stores is a single ``bytes`` equality instead of a recursive dict compare.
+        """
+        doc = self.load_doc(conversation_id)
+        return None if doc is None else canonical_json(doc)
+
     @abstractmethod
     def load_settings(self, conversation_id: str) -> dict[str, Any]:
         """Load per-conversation settings. Return empty dict if none."""
@@ -60,3 +124,11 @@ class ConversationStore(ABC):
     @abstractmethod
     def save_variables(self, conversation_id: str, variables: dict[str, Any]) -> None:
         """Persist per-conversation context variables."""
+
+    @contextmanager
+    def bulk_writes(self) -> Iterator[None]:
+        """Group many writes into one unit of work (e.g. a single transaction).
+
+        Default is a no-op; transactional backends commit once on exit.
+        """
+        yield
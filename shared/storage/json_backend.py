@@ -2,91 +2,232 @@
 
 from __future__ import annotations
 
-import json
+import functools
+import mmap
+import os
+import shutil
+import threading
+import uuid
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
+from shared import fast_json
 from shared.atomic_write import atomic_write_json
 
-from .base import CatalogStore, ConversationStore
+from .base import CatalogStore, ConversationStore, json_loads
 
 # entity_type → JSON filename inside each entity subfolder
-_ENTITY_JSON: dict[str, str] = {
-    "presets": "preset.json",
-    "world_books": "worldbook.json",
-    "characters": "character.json",
-    "personas": "persona.json",
-    "regex_rules": "regex_rule.json",
-    "llm_configs": "llm_config.json",
-}
+_ENTITY_JSON: Mapping[str, str] = MappingProxyType(
+    {
+        "presets": "preset.json",
+        "world_books": "worldbook.json",
+        "characters": "character.json",
+        "personas": "persona.json",
+        "regex_rules": "regex_rule.json",
+        "llm_configs": "llm_config.json",
+    }
+)
+
+
+@functools.lru_cache(maxsize=32)
+def _json_filename(entity_type: str) -> str:
+    # Cached: unknown types would otherwise build the fallback name on every call
+    return _ENTITY_JSON.get(entity_type) or f"{entity_type.rstrip('s')}.json"
+
+
+# Files above this size are parsed straight from an mmap (no read() copy); smaller
+# ones are cheaper to read() than to map
+_MMAP_MIN_SIZE = 64 * 1024
 
 
 def _safe_read_json(p: Path) -> dict[str, Any] | None:
     try:
-        with p.open("r", encoding="utf-8") as f:
-            return json.load(f)
+        with p.open("rb") as f:
+            if fast_json.HAS_ORJSON and os.fstat(f.fileno()).st_size > _MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    return json_loads(view)
+            return json_loads(f.read())
     except Exception:
         return None
 
 
+def _read_bytes(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+# Listings at least this long read their files on a shared thread pool (file reads
+# release the GIL, so several can be in flight); shorter ones read inline
+_PARALLEL_READ_MIN = 32
+_READ_WORKERS = 8
+_read_pool: ThreadPoolExecutor | None = None
+_read_pool_lock = threading.Lock()
+
+
+def _get_read_pool() -> ThreadPoolExecutor:
+    global _read_pool
+    if _read_pool is None:
+        with _read_pool_lock:
+            if _read_pool is None:
+                _read_pool = ThreadPoolExecutor(max_workers=_READ_WORKERS, thread_name_prefix="json-read")
+    return _read_pool
+
+
+def _read_many(paths: list[str]) -> list[bytes | None]:
+    """Read every file in *paths* (``None`` for unreadable ones), in order.
+
+    All reads of a listing go through this one call so the I/O strategy lives in one
+    place, separate from parsing.
+    """
+    if len(paths) < _PARALLEL_READ_MIN:
+        return [_read_bytes(p) for p in paths]
+    return list(_get_read_pool().map(_read_bytes, paths))
+
+
+def _parse_json(raw: bytes | None) -> dict[str, Any] | None:
+    if raw is None:
+        return None
+    try:
+        return json_loads(raw)
+    except Exception:
+        return None
+
+
+# Deleted items are renamed into <data_root>/.trash and removed by a background worker
+# (its thread is joined at interpreter exit, so queued deletes still complete)
+_TRASH_DIR = ".trash"
+_trash_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="json-trash")
+
+
+def _entity_subdirs(folder: Path) -> list[os.DirEntry]:
+    """Entity subfolders of *folder* sorted by name (empty if *folder* is missing).
+
+    os.scandir hands back DirEntry objects whose is_dir() answers from the
+    directory listing itself, instead of a Path + stat per child.
+    """
+    try:
+        with os.scandir(folder) as it:
+            subs = [e for e in it if e.is_dir()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    subs.sort(key=lambda e: e.name)
+    return subs
+
+
+def _item_signature(sub: os.DirEntry, json_path: str) -> tuple:
+    """Cheap change detector for one entity folder: two stats instead of a read + parse.
+
+    The folder mtime moves when entries are added, removed or atomically replaced
+    (icon.png, the JSON file); the JSON file's own mtime/size catches in-place edits.
+    """
+    try:
+        st = os.stat(json_path)
+        return (sub.name, sub.stat().st_mtime_ns, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (sub.name, None, None, None)
+
+
 class JsonCatalogStore(CatalogStore):
     """File-system catalog store — one directory per entity, JSON file inside."""
 
     def __init__(self, data_root: Path | str):
         self._root = Path(data_root)
+        # icon_path is relative to the project dir (data_root/../..); computed once as a
+        # string prefix so the listing loop slices strings instead of comparing Path parts
+        icon_base = str(self._root.parent.parent)
+        self._icon_base = "" if icon_base == "." else os.path.join(icon_base, "")
+        # entity_type → (per-folder signatures, summaries built from them)
+        self._list_cache: dict[str, tuple[tuple, list[dict[str, Any]]]] = {}
+        # Finish deletes a previous process left half-done
+        leftover = self._root / _TRASH_DIR
+        if leftover.is_dir():
+            _trash_pool.submit(shutil.rmtree, leftover, ignore_errors=True)
 
     def _entity_dir(self, entity_type: str) -> Path:
         return self._root / entity_type
 
-    def _json_filename(self, entity_type: str) -> str:
-        return _ENTITY_JSON.get(entity_type, f"{entity_type.rstrip('s')}.json")
+    def _icon_rel(self, icon: str) -> str:
+        """*icon* (a path under the data root) relative to the project dir, with ``/`` separators."""
+        rel = icon.removeprefix(self._icon_base)
+        return rel.replace(os.sep, "/") if os.sep != "/" else rel
 
     def list_items(self, entity_type: str) -> list[dict[str, Any]]:
-        folder = self._entity_dir(entity_type)
-        if not folder.is_dir():
-            return []
-        json_name = self._json_filename(entity_type)
+        json_name = _json_filename(entity_type)
+        subs = _entity_subdirs(self._entity_dir(entity_type))
+        paths = [os.path.join(sub.path, json_name) for sub in subs]
+        sig = tuple(_item_signature(sub, p) for sub, p in zip(subs, paths, strict=True))
+        cached = self._list_cache.get(entity_type)
+        if cached is not None and cached[0] == sig:
+            return [dict(item) for item in cached[1]]
+
+        raws = _read_many(paths)
         items: list[dict[str, Any]] = []
-        for sub in sorted(folder.iterdir()):
-            if not sub.is_dir():
-                continue
-            p = sub / json_name
-            if not p.exists():
-                continue
-            doc = _safe_read_json(p)
+        for sub, raw in zip(subs, raws, strict=True):
+            doc = _parse_json(raw)
             if doc is None:
                 continue
+            name = sub.name
             item: dict[str, Any] = {
-                "name": doc.get("name", sub.name),
-                "folder_name": sub.name,
-                "file": f"{entity_type}/{sub.name}",
+                "name": doc.get("name", name),
+                "folder_name": name,
+                "file": f"{entity_type}/{name}",
             }
             if "description" in doc:
                 item["description"] = doc["description"]
-            icon = sub / "icon.png"
-            if icon.exists():
-                item["icon_path"] = icon.relative_to(self._root.parent.parent).as_posix()
+            icon = os.path.join(sub.path, "icon.png")
+            if os.path.exists(icon):
+                item["icon_path"] = self._icon_rel(icon)
             items.append(item)
-        return items
+        self._list_cache[entity_type] = (sig, items)
+        return [dict(item) for item in items]
+
+    def iter_items_full(self, entity_type: str) -> Iterator[tuple[str, dict[str, Any]]]:
+        json_name = _json_filename(entity_type)
+        subs = _entity_subdirs(self._entity_dir(entity_type))
+        raws = _read_many([os.path.join(sub.path, json_name) for sub in subs])
+        for sub, raw in zip(subs, raws, strict=True):
+            doc = _parse_json(raw)
+            if doc is None:
+                continue
+            if "icon_path" not in doc:
+                icon = os.path.join(sub.path, "icon.png")
+                if os.path.exists(icon):
+                    doc["icon_path"] = self._icon_rel(icon)
+            yield sub.name, doc
 
     def get_item(self, entity_type: str, name: str) -> dict[str, Any] | None:
         folder = self._entity_dir(entity_type) / name
-        p = folder / self._json_filename(entity_type)
+        p = folder / _json_filename(entity_type)
         return _safe_read_json(p)
 
     def save_item(self, entity_type: str, name: str, data: dict[str, Any]) -> None:
         folder = self._entity_dir(entity_type) / name
         folder.mkdir(parents=True, exist_ok=True)
-        p = folder / self._json_filename(entity_type)
+        p = folder / _json_filename(entity_type)
         atomic_write_json(p, data)
+        self._list_cache.pop(entity_type, None)
 
     def delete_item(self, entity_type: str, name: str) -> bool:
-        import shutil
-
         folder = self._entity_dir(entity_type) / name
         if not folder.is_dir():
             return False
-        shutil.rmtree(folder)
+        # One rename takes the item out of every listing; the files are unlinked in the background
+        trash = self._root / _TRASH_DIR / f"{entity_type}-{uuid.uuid4().hex}"
+        try:
+            trash.parent.mkdir(exist_ok=True)
+            folder.rename(trash)
+        except OSError:
+            # e.g. a file held open on Windows: fall back to deleting in place
+            shutil.rmtree(folder)
+        else:
+            _trash_pool.submit(shutil.rmtree, trash, ignore_errors=True)
+        self._list_cache.pop(entity_type, None)
         return True
 
 
@@ -106,7 +247,7 @@ class JsonConversationStore(ConversationStore):
     def save_doc(self, conversation_id: str, doc: dict[str, Any]) -> None:
         d = self._conv_dir(conversation_id)
         d.mkdir(parents=True, exist_ok=True)
-        atomic_write_json(d / "conversation.json", doc)
+        atomic_write_json(d / "conversation.json", doc, pretty=False)
 
     def load_settings(self, conversation_id: str) -> dict[str, Any]:
         p = self._conv_dir(conversation_id) / "settings.json"
@@ -115,7 +256,7 @@ class JsonConversationStore(ConversationStore):
     def save_settings(self, conversation_id: str, settings: dict[str, Any]) -> None:
         d = self._conv_dir(conversation_id)
         d.mkdir(parents=True, exist_ok=True)
-        atomic_write_json(d / "settings.json", settings)
+        atomic_write_json(d / "settings.json", settings, pretty=False)
 
     def load_variables(self, conversation_id: str) -> dict[str, Any]:
         p = self._conv_dir(conversation_id) / "variables.json"
@@ -124,4 +265,4 @@ class JsonConversationStore(ConversationStore):
     def save_variables(self, conversation_id: str, variables: dict[str, Any]) -> None:
         d = self._conv_dir(conversation_id)
         d.mkdir(parents=True, exist_ok=True)
-        atomic_write_json(d / "variables.json", variables)
+        atomic_write_json(d / "variables.json", variables, pretty=False)
@@ -27,6 +27,7 @@ CREATE TABLE IF NOT EXISTS conversation_nodes (
     content TEXT NOT NULL DEFAULT '',
     metadata JSON,
     sibling_order INTEGER NOT NULL DEFAULT 0,
+    row_hash INTEGER,
     PRIMARY KEY (conversation_id, node_id)
 );
 
@@ -41,3 +42,17 @@ CREATE TABLE IF NOT EXISTS conversation_variables (
     conversation_id TEXT PRIMARY KEY REFERENCES conversations(id) ON DELETE CASCADE,
     data JSON NOT NULL
 );
+
+-- Saving settings/variables for a conversation that has no doc yet creates its row,
+-- so the save itself is a single upsert (BEFORE: the parent exists for the FK check)
+CREATE TRIGGER IF NOT EXISTS conversation_settings_ensure_conversation
+BEFORE INSERT ON conversation_settings
+BEGIN
+    INSERT OR IGNORE INTO conversations (id, roots, active_path) VALUES (NEW.conversation_id, '[]', '[]');
+END;
+
+CREATE TRIGGER IF NOT EXISTS conversation_variables_ensure_conversation
+BEFORE INSERT ON conversation_variables
+BEGIN
+    INSERT OR IGNORE INTO conversations (id, roots, active_path) VALUES (NEW.conversation_id, '[]', '[]');
+END;
@@ -2,18 +2,108 @@
 
 from __future__ import annotations
 
-import json
+import atexit
+import hashlib
 import sqlite3
 import threading
+import zlib
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
-from .base import CatalogStore, ConversationStore
+from .base import CatalogStore, ConversationStore, json_dumps, json_loads
 
 _SCHEMA_FILE = Path(__file__).parent / "schema.sql"
 
 # Top-level conversation doc keys that are stored relationally (not in metadata)
-_CONVERSATION_STRUCTURAL_KEYS = {"roots", "nodes", "children", "active_path"}
+_CONVERSATION_STRUCTURAL_KEYS = frozenset({"roots", "nodes", "children", "active_path"})
+
+# Node keys stored in their own columns (everything else goes to the metadata column)
+_NODE_COLUMN_KEYS = frozenset({"pid", "role", "content"})
+
+_UPSERT_NODE_SQL = """INSERT INTO conversation_nodes
+                      (conversation_id, node_id, parent_id, role, content, metadata, sibling_order, row_hash)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                      ON CONFLICT(conversation_id, node_id) DO UPDATE
+                      SET parent_id = excluded.parent_id, role = excluded.role, content = excluded.content,
+                          metadata = excluded.metadata, sibling_order = excluded.sibling_order,
+                          row_hash = excluded.row_hash"""
+
+
+def _row_hash(*values: Any) -> int:
+    """Signed 64-bit digest of a node row's stored columns (fits an SQLite INTEGER)."""
+    digest = hashlib.blake2b(repr(values).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+# Per-conversation JSON tables: settings and variables share one shape. A schema trigger
+# creates the conversations row on first save, so each save is this one statement.
+_UPSERT_DATA_SQL = {
+    table: f"""INSERT INTO {table} (conversation_id, data)
+               VALUES (?, ?)
+               ON CONFLICT(conversation_id) DO UPDATE SET data = excluded.data"""
+    for table in ("conversation_settings", "conversation_variables")
+}
+_SELECT_DATA_SQL = {table: f"SELECT data FROM {table} WHERE conversation_id = ?" for table in _UPSERT_DATA_SQL}
+
+_UPSERT_ITEM_SQL = """INSERT INTO catalog_items (entity_type, name, data, icon_path, updated_at)
+                   VALUES (?, ?, ?, ?, datetime('now'))
+                   ON CONFLICT(entity_type, name) DO UPDATE
+                   SET data = excluded.data, icon_path = excluded.icon_path, updated_at = datetime('now')"""
+
+
+# Per-connection prepared-statement cache (sqlite3 default: 128); every statement in
+# this module is a constant string, so repeated calls skip sqlite3_prepare entirely
+_CACHED_STATEMENTS = 256
+
+
+def _connect(db_path: str, *, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        # mode=ro needs the URI form; as_uri() percent-encodes '#', '?' and '%' in the path
+        uri = f"{Path(db_path).absolute().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=_CACHED_STATEMENTS)
+        conn.execute("PRAGMA query_only=ON")
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=_CACHED_STATEMENTS)
+    conn.row_factory = sqlite3.Row
+    _tune_conn(conn, read_only=read_only)
+    return conn
+
+
+def _tune_conn(conn: sqlite3.Connection, *, read_only: bool = False) -> None:
+    """Per-connection performance pragmas (none of them persist in the database file).
+
+    Lock waits are bounded by sqlite3.connect's ``timeout`` (5 s default = busy_timeout=5000).
+    """
+    if not read_only:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+
+
+_shared = threading.local()
+
+
+def get_shared_conn(db_path: Path | str, *, read_only: bool = False) -> sqlite3.Connection:
+    """Return this thread's cached, tuned connection to *db_path*.
+
+    Lets several stores (and helper queries) reuse one connection instead of each
+    paying its own open. Pass it to the stores via ``conn=``.
+    """
+    conns: dict[tuple[str, bool], sqlite3.Connection] | None = getattr(_shared, "conns", None)
+    if conns is None:
+        conns = _shared.conns = {}
+    key = (str(db_path), read_only)
+    conn = conns.get(key)
+    if conn is None:
+        conn = _connect(key[0], read_only=read_only)
+        conns[key] = conn
+    return conn
 
 
 def _init_db(conn: sqlite3.Connection) -> None:
@@ -31,63 +121,364 @@ def _init_db(conn: sqlite3.Connection) -> None:
         conn.execute("SELECT sibling_order FROM conversation_nodes LIMIT 0")
     except sqlite3.OperationalError:
         conn.execute("ALTER TABLE conversation_nodes ADD COLUMN sibling_order INTEGER NOT NULL DEFAULT 0")
+    # Add row_hash column if upgrading from older schema (NULL hashes just force one rewrite)
+    try:
+        conn.execute("SELECT row_hash FROM conversation_nodes LIMIT 0")
+    except sqlite3.OperationalError:
+        conn.execute("ALTER TABLE conversation_nodes ADD COLUMN row_hash INTEGER")
+
+
+def _extra_json(obj: dict[str, Any], stored_keys: frozenset[str]) -> str | None:
+    """JSON of *obj*'s keys outside *stored_keys* (``None`` if there are none).
+
+    The common case (only column-backed keys) is a C-level key-set check with no
+    temporary dict built.
+    """
+    if obj.keys() <= stored_keys:
+        return None
+    return json_dumps({k: v for k, v in obj.items() if k not in stored_keys})
+
+
+# Node content and settings/variables JSON at least this long are stored zlib-compressed
+# as a BLOB; text columns never hold bytes otherwise, so the value type marks the format
+_COMPRESS_MIN = 256
+
+
+def _pack_text(text: str) -> str | bytes:
+    if len(text) < _COMPRESS_MIN:
+        return text
+    raw = text.encode("utf-8")
+    packed = zlib.compress(raw, 1)
+    return packed if len(packed) < len(raw) else text
+
+
+def _unpack_text(value: str | bytes) -> str:
+    return zlib.decompress(value).decode("utf-8") if value.__class__ is bytes else value
+
+
+def _json_value(json_type: str, value: Any) -> Any:
+    """Python value of a json_extract() result, given its json_type()."""
+    if json_type in ("object", "array"):
+        return json_loads(value)
+    if json_type == "true":
+        return True
+    if json_type == "false":
+        return False
+    return value
+
+
+class _Writer:
+    """A write connection plus the state every store writing through it must share."""
+
+    __slots__ = ("conn", "in_bulk", "lock")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.in_bulk = False
 
 
-class SqliteCatalogStore(CatalogStore):
-    def __init__(self, db_path: Path | str, *, read_only: bool = False):
+class _ConnPool:
+    """One writer plus one read-only connection per reading thread, for one database file.
+
+    In WAL mode readers never block the writer (or each other), so reads run on the
+    calling thread's own reader connection without taking any lock.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        conn = _connect(db_path)
+        _init_db(conn)
+        self.writer = _Writer(conn)
+        self.refs = 0
+        # thread ident → that thread's reader; only touched under the lock when adding/pruning
+        self._readers: dict[int, sqlite3.Connection] = {}
+        self._readers_lock = threading.Lock()
+
+    def reader(self) -> sqlite3.Connection:
+        tid = threading.get_ident()
+        conn = self._readers.get(tid)
+        if conn is None:
+            conn = _connect(self.db_path, read_only=True)
+            with self._readers_lock:
+                # Close readers left behind by threads that have exited
+                live = {t.ident for t in threading.enumerate()}
+                for dead in [t for t in self._readers if t not in live]:
+                    self._readers.pop(dead).close()
+                self._readers[tid] = conn
+        return conn
+
+    def close(self) -> None:
+        with self._readers_lock:
+            readers, self._readers = self._readers, {}
+        for conn in readers.values():
+            conn.close()
+        with self.writer.lock:
+            self.writer.conn.close()
+
+
+_pools: dict[str, _ConnPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _acquire_pool(db_path: str) -> _ConnPool:
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = _ConnPool(db_path)
+        pool.refs += 1
+        return pool
+
+
+def _release_pool(pool: _ConnPool) -> None:
+    with _pools_lock:
+        pool.refs -= 1
+        if pool.refs > 0:
+            return
+        if _pools.get(pool.db_path) is pool:
+            del _pools[pool.db_path]
+    pool.close()
+
+
+# id(conn) → (writer, refs) for connections supplied via ``conn=``; the writer keeps the
+# connection alive, so its id cannot be reused while it is registered.
+_supplied_writers: dict[int, tuple[_Writer, int]] = {}
+_supplied_lock = threading.Lock()
+
+
+def _acquire_writer(conn: sqlite3.Connection, *, init: bool) -> _Writer:
+    """The _Writer shared by every store on a supplied connection (schema set up on first use)."""
+    with _supplied_lock:
+        entry = _supplied_writers.get(id(conn))
+        if entry is None:
+            if init:
+                _init_db(conn)
+            entry = (_Writer(conn), 0)
+        writer, refs = entry
+        _supplied_writers[id(conn)] = (writer, refs + 1)
+        return writer
+
+
+def _release_writer(writer: _Writer) -> None:
+    key = id(writer.conn)
+    with _supplied_lock:
+        refs = _supplied_writers[key][1] - 1
+        if refs:
+            _supplied_writers[key] = (writer, refs)
+        else:
+            del _supplied_writers[key]
+
+
+class _SqliteStore:
+    """Connection + lock handling shared by the SQLite stores.
+
+    A read-write store without ``conn=`` uses the per-database pool: every store on
+    that file shares one writer, and reads run on per-thread read-only connections.
+    A supplied connection (see get_shared_conn) or a read-only store uses a single
+    connection for everything; stores given the same connection share its lock and
+    bulk_writes transaction.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        *,
+        read_only: bool = False,
+        conn: sqlite3.Connection | None = None,
+    ):
         self._db_path = str(db_path)
-        self._lock = threading.Lock()
-        if read_only:
-            self._conn = sqlite3.connect(f"file:{self._db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._pool: _ConnPool | None = None
+        self._supplied: _Writer | None = None
+        self._owns_conn = False
+        if conn is not None:
+            self._writer = self._supplied = _acquire_writer(conn, init=not read_only)
+        elif not read_only:
+            self._pool = _acquire_pool(self._db_path)
+            self._writer = self._pool.writer
         else:
-            self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
-        self._conn.row_factory = sqlite3.Row
-        if not read_only:
-            _init_db(self._conn)
+            self._writer = _Writer(_connect(self._db_path, read_only=True))
+            self._owns_conn = True
+        self._conn = self._writer.conn
+        self._lock = self._writer.lock
 
-    def list_items(self, entity_type: str) -> list[dict[str, Any]]:
+    def close(self) -> None:
+        """Release the connection: pooled ones close with the last store using them.
+
+        A connection supplied via ``conn=`` is left open; whoever created it closes it.
+        """
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            _release_pool(pool)
+        elif self._owns_conn:
+            with self._lock:
+                self._conn.close()
+        elif self._supplied is not None:
+            writer, self._supplied = self._supplied, None
+            _release_writer(writer)
+
+    def checkpoint(self) -> None:
+        """Copy committed WAL content back into the database file without blocking anyone.
+
+        A PASSIVE checkpoint does what readers/writers allow right now and returns; run
+        it when idle so the automatic checkpoint (left at SQLite's 1000-page default,
+        which still bounds the WAL when this never runs) has less to do in a commit.
+        """
+        with self._lock:
+            if not self._writer.in_bulk:
+                self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        """Connection for a read: this thread's reader, or the writer inside bulk_writes (to see its own writes)."""
+        if self._pool is None or self._writer.in_bulk:
+            with self._lock:
+                yield self._conn
+        else:
+            yield self._pool.reader()
+
+    @contextmanager
+    def bulk_writes(self) -> Iterator[None]:
+        """Run all writes inside the block in one ``BEGIN IMMEDIATE`` transaction (one commit/fsync)."""
+        with self._lock:
+            if self._writer.in_bulk:
+                nested = True
+            else:
+                nested = False
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._writer.in_bulk = True
+        if nested:
+            yield
+            return
+        try:
+            yield
+        except BaseException:
+            with self._lock:
+                self._writer.in_bulk = False
+                self._conn.rollback()
+            raise
         with self._lock:
-            rows = self._conn.execute(
+            self._writer.in_bulk = False
+            self._conn.commit()
+
+    def _commit(self) -> None:
+        # Inside bulk_writes the enclosing transaction commits once on exit
+        if not self._writer.in_bulk:
+            self._conn.commit()
+
+    @contextmanager
+    def _write_txn(self) -> Iterator[None]:
+        """Multi-statement write: own transaction, or a savepoint inside bulk_writes. Caller holds the lock."""
+        if self._writer.in_bulk:
+            self._conn.execute("SAVEPOINT write_txn")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK TO write_txn")
+                self._conn.execute("RELEASE write_txn")
+                raise
+            self._conn.execute("RELEASE write_txn")
+            return
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+
+class SqliteCatalogStore(_SqliteStore, CatalogStore):
+    def list_items(self, entity_type: str) -> list[dict[str, Any]]:
+        # Only name/description are needed: let SQLite pull them out of the JSON instead
+        # of shipping and decoding every full document. json_type is NULL for a missing key.
+        try:
+            with self._reading() as conn:
+                rows = conn.execute(
+                    """SELECT name, icon_path,
+                              json_type(data, '$.name'), json_extract(data, '$.name'),
+                              json_type(data, '$.description'), json_extract(data, '$.description')
+                       FROM catalog_items WHERE entity_type = ? ORDER BY name""",
+                    (entity_type,),
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            # SQLite's JSON functions reject NaN/Infinity, which the stdlib writes and reads
+            if "malformed JSON" not in str(e):
+                raise
+            return self._list_items_parsed(entity_type)
+        items = []
+        for folder_name, icon_path, name_type, name, desc_type, desc in rows:
+            item: dict[str, Any] = {
+                "name": folder_name if name_type is None else _json_value(name_type, name),
+                "folder_name": folder_name,
+                "file": f"{entity_type}/{folder_name}",
+            }
+            if desc_type is not None:
+                item["description"] = _json_value(desc_type, desc)
+            if icon_path:
+                item["icon_path"] = icon_path
+            items.append(item)
+        return items
+
+    def _list_items_parsed(self, entity_type: str) -> list[dict[str, Any]]:
+        """:meth:`list_items` decoding each full document in Python."""
+        with self._reading() as conn:
+            rows = conn.execute(
                 "SELECT name, data, icon_path FROM catalog_items WHERE entity_type = ? ORDER BY name",
                 (entity_type,),
             ).fetchall()
         items = []
-        for row in rows:
-            doc = json.loads(row["data"])
+        for folder_name, data, icon_path in rows:
+            doc = json_loads(data)
             item: dict[str, Any] = {
-                "name": doc.get("name", row["name"]),
-                "folder_name": row["name"],
-                "file": f"{entity_type}/{row['name']}",
+                "name": doc.get("name", folder_name),
+                "folder_name": folder_name,
+                "file": f"{entity_type}/{folder_name}",
             }
             if "description" in doc:
                 item["description"] = doc["description"]
-            if row["icon_path"]:
-                item["icon_path"] = row["icon_path"]
+            if icon_path:
+                item["icon_path"] = icon_path
             items.append(item)
         return items
 
     def get_item(self, entity_type: str, name: str) -> dict[str, Any] | None:
-        with self._lock:
-            row = self._conn.execute(
+        with self._reading() as conn:
+            row = conn.execute(
                 "SELECT data FROM catalog_items WHERE entity_type = ? AND name = ?",
                 (entity_type, name),
             ).fetchone()
         if row is None:
             return None
-        return json.loads(row["data"])
+        return json_loads(row["data"])
+
+    def iter_items_full(self, entity_type: str) -> Iterator[tuple[str, dict[str, Any]]]:
+        with self._reading() as conn:
+            rows = conn.execute(
+                "SELECT name, data, icon_path FROM catalog_items WHERE entity_type = ? ORDER BY name",
+                (entity_type,),
+            ).fetchall()
+        for row in rows:
+            data = json_loads(row["data"])
+            if row["icon_path"] and "icon_path" not in data:
+                data["icon_path"] = row["icon_path"]
+            yield row["name"], data
 
     def save_item(self, entity_type: str, name: str, data: dict[str, Any]) -> None:
         icon_path = data.get("icon_path")
-        blob = json.dumps(data, ensure_ascii=False)
+        blob = json_dumps(data)
         with self._lock:
-            self._conn.execute(
-                """INSERT INTO catalog_items (entity_type, name, data, icon_path, updated_at)
-                   VALUES (?, ?, ?, ?, datetime('now'))
-                   ON CONFLICT(entity_type, name) DO UPDATE
-                   SET data = excluded.data, icon_path = excluded.icon_path, updated_at = datetime('now')""",
-                (entity_type, name, blob, icon_path),
-            )
-            self._conn.commit()
+            self._conn.execute(_UPSERT_ITEM_SQL, (entity_type, name, blob, icon_path))
+            self._commit()
+
+    def bulk_save_items(self, entity_type: str, rows: Iterable[tuple[str, dict[str, Any]]]) -> int:
+        # Serialize outside the lock, then one prepared statement + one commit for all rows
+        params = [(entity_type, name, json_dumps(data), data.get("icon_path")) for name, data in rows]
+        if not params:
+            return 0
+        with self._lock:
+            self._conn.executemany(_UPSERT_ITEM_SQL, params)
+            self._commit()
+        return len(params)
 
     def delete_item(self, entity_type: str, name: str) -> bool:
         with self._lock:
@@ -95,57 +486,80 @@ class SqliteCatalogStore(CatalogStore):
                 "DELETE FROM catalog_items WHERE entity_type = ? AND name = ?",
                 (entity_type, name),
             )
-            self._conn.commit()
+            self._commit()
         return cur.rowcount > 0
 
 
-class SqliteConversationStore(ConversationStore):
-    def __init__(self, db_path: Path | str, *, read_only: bool = False):
-        self._db_path = str(db_path)
-        self._lock = threading.Lock()
-        if read_only:
-            self._conn = sqlite3.connect(f"file:{self._db_path}?mode=ro", uri=True, check_same_thread=False)
-        else:
-            self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
-        self._conn.row_factory = sqlite3.Row
-        if not read_only:
-            _init_db(self._conn)
+class SqliteConversationStore(_SqliteStore, ConversationStore):
+    """Conversation store on SQLite.
+
+    *write_delay* > 0 (seconds) turns on write coalescing for settings and variables:
+    saves are buffered, latest value per conversation winning, and written together
+    in one transaction after *write_delay*, on flush()/close(), or at interpreter
+    exit. Loads see buffered values immediately; a crash loses at most *write_delay*
+    worth of settings/variables saves.
+    """
+
+    def __init__(
+        self,
+        db_path: Path | str,
+        *,
+        read_only: bool = False,
+        conn: sqlite3.Connection | None = None,
+        write_delay: float = 0.0,
+    ):
+        super().__init__(db_path, read_only=read_only, conn=conn)
+        self._write_delay = 0.0 if read_only else write_delay
+        # table → conversation_id → serialized data awaiting flush
+        self._pending: dict[str, dict[str, str]] = {table: {} for table in _UPSERT_DATA_SQL}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_timer: threading.Timer | None = None
+        if self._write_delay > 0:
+            atexit.register(self.flush)
 
     def load_doc(self, conversation_id: str) -> dict[str, Any] | None:
-        with self._lock:
-            row = self._conn.execute(
-                "SELECT roots, active_path, metadata FROM conversations WHERE id = ?",
-                (conversation_id,),
-            ).fetchone()
-            if row is None:
-                return None
-            node_rows = self._conn.execute(
-                "SELECT node_id, parent_id, role, content, metadata FROM conversation_nodes "
-                "WHERE conversation_id = ? ORDER BY parent_id, sibling_order",
-                (conversation_id,),
-            ).fetchall()
+        with self._reading() as conn:
+            # One read transaction, so both SELECTs see the same snapshot
+            conn.execute("SAVEPOINT load_doc")
+            try:
+                row = conn.execute(
+                    "SELECT roots, active_path, metadata FROM conversations WHERE id = ?",
+                    (conversation_id,),
+                ).fetchone()
+                if row is None:
+                    return None
+                # Plain tuples for the per-node rows: unpacked positionally, no Row name lookups
+                cur = conn.cursor()
+                cur.row_factory = None
+                node_rows = cur.execute(
+                    "SELECT parent_id, node_id, role, content, metadata FROM conversation_nodes "
+                    "WHERE conversation_id = ? ORDER BY parent_id, sibling_order",
+                    (conversation_id,),
+                ).fetchall()
+            finally:
+                conn.execute("RELEASE load_doc")
 
-        roots = json.loads(row["roots"])
-        active_path = json.loads(row["active_path"])
-        conv_meta = json.loads(row["metadata"]) if row["metadata"] else {}
+        roots = json_loads(row["roots"])
+        active_path = json_loads(row["active_path"])
+        conv_meta = json_loads(row["metadata"]) if row["metadata"] else {}
         nodes: dict[str, dict[str, Any]] = {}
         children: dict[str, list[str]] = {}
 
-        for nr in node_rows:
-            nid = nr["node_id"]
-            meta = json.loads(nr["metadata"]) if nr["metadata"] else {}
-            node: dict[str, Any] = {
-                "pid": nr["parent_id"],
-                "role": nr["role"],
-                "content": nr["content"],
-            }
-            node.update(meta)
-            nodes[nid] = node
-            pid = nr["parent_id"]
+        # Rows arrive grouped by parent (ORDER BY parent_id, sibling_order), so each
+        # sibling list is built in one run; the primary key rules out duplicates
+        for pid, group in groupby(node_rows, key=itemgetter(0)):
+            siblings = []
+            for _, nid, role, content, meta in group:
+                if content.__class__ is bytes:
+                    content = _unpack_text(content)
+                node: dict[str, Any] = {"pid": pid, "role": role, "content": content}
+                if meta:
+                    node.update(json_loads(meta))
+                nodes[nid] = node
+                siblings.append(nid)
             if pid is not None:
-                children.setdefault(pid, [])
-                if nid not in children[pid]:
-                    children[pid].append(nid)
+                children[pid] = siblings
 
         result: dict[str, Any] = {}
         result.update(conv_meta)
@@ -156,12 +570,11 @@ class SqliteConversationStore(ConversationStore):
         return result
 
     def save_doc(self, conversation_id: str, doc: dict[str, Any]) -> None:
-        roots = json.dumps(doc.get("roots") or [], ensure_ascii=False)
-        active_path = json.dumps(doc.get("active_path") or [], ensure_ascii=False)
+        roots = json_dumps(doc.get("roots") or [])
+        active_path = json_dumps(doc.get("active_path") or [])
         nodes = doc.get("nodes", {})
         children_dict = doc.get("children", {})
-        meta = {k: v for k, v in doc.items() if k not in _CONVERSATION_STRUCTURAL_KEYS}
-        meta_json = json.dumps(meta, ensure_ascii=False) if meta else None
+        meta_json = _extra_json(doc, _CONVERSATION_STRUCTURAL_KEYS)
 
         # Pre-compute sibling ordering from children dict
         sibling_orders: dict[str, int] = {}
@@ -169,88 +582,115 @@ class SqliteConversationStore(ConversationStore):
             for idx, child_id in enumerate(child_list):
                 sibling_orders[child_id] = idx
 
-        with self._lock:
-            try:
-                self._conn.execute("BEGIN IMMEDIATE")
-                self._conn.execute(
-                    """INSERT INTO conversations (id, roots, active_path, metadata, updated_at)
-                       VALUES (?, ?, ?, ?, datetime('now'))
-                       ON CONFLICT(id) DO UPDATE
-                       SET roots = excluded.roots, active_path = excluded.active_path,
-                           metadata = excluded.metadata, updated_at = datetime('now')""",
-                    (conversation_id, roots, active_path, meta_json),
-                )
-                self._conn.execute(
-                    "DELETE FROM conversation_nodes WHERE conversation_id = ?",
+        # Serialize and hash every node row before taking the lock
+        node_rows = []
+        for nid, node in nodes.items():
+            values = (
+                node.get("pid"),
+                node.get("role", ""),
+                node.get("content", ""),
+                _extra_json(node, _NODE_COLUMN_KEYS),
+                sibling_orders.get(nid, 0),
+            )
+            node_rows.append((conversation_id, nid, *values, _row_hash(*values)))
+
+        with self._lock, self._write_txn():
+            self._conn.execute(
+                """INSERT INTO conversations (id, roots, active_path, metadata, updated_at)
+                   VALUES (?, ?, ?, ?, datetime('now'))
+                   ON CONFLICT(id) DO UPDATE
+                   SET roots = excluded.roots, active_path = excluded.active_path,
+                       metadata = excluded.metadata, updated_at = datetime('now')""",
+                (conversation_id, roots, active_path, meta_json),
+            )
+            # Apply only the delta: rows whose stored hash differs, and rows no longer in the doc
+            stored = {
+                nid: h
+                for nid, h in self._conn.execute(
+                    "SELECT node_id, row_hash FROM conversation_nodes WHERE conversation_id = ?",
                     (conversation_id,),
                 )
-                for nid, node in nodes.items():
-                    pid = node.get("pid")
-                    role = node.get("role", "")
-                    content = node.get("content", "")
-                    node_meta = {k: v for k, v in node.items() if k not in ("pid", "role", "content")}
-                    node_meta_json = json.dumps(node_meta, ensure_ascii=False) if node_meta else None
-                    self._conn.execute(
-                        """INSERT INTO conversation_nodes
-                           (conversation_id, node_id, parent_id, role, content, metadata, sibling_order)
-                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                        (conversation_id, nid, pid, role, content, node_meta_json, sibling_orders.get(nid, 0)),
-                    )
-                self._conn.execute("COMMIT")
-            except BaseException:
-                self._conn.execute("ROLLBACK")
-                raise
+            }
+            stale = stored.keys() - nodes.keys()
+            if stale:
+                self._conn.executemany(
+                    "DELETE FROM conversation_nodes WHERE conversation_id = ? AND node_id = ?",
+                    [(conversation_id, nid) for nid in stale],
+                )
+            # Hashes cover the uncompressed values; only rows actually written get compressed
+            self._conn.executemany(
+                _UPSERT_NODE_SQL,
+                [(*r[:4], _pack_text(r[4]), *r[5:]) for r in node_rows if stored.get(r[1]) != r[-1]],
+            )
 
     def load_settings(self, conversation_id: str) -> dict[str, Any]:
-        with self._lock:
-            row = self._conn.execute(
-                "SELECT data FROM conversation_settings WHERE conversation_id = ?",
-                (conversation_id,),
-            ).fetchone()
-        if row is None:
-            return {}
-        return json.loads(row["data"])
+        return self._load_data("conversation_settings", conversation_id)
 
     def save_settings(self, conversation_id: str, settings: dict[str, Any]) -> None:
-        blob = json.dumps(settings, ensure_ascii=False)
-        with self._lock:
-            self._conn.execute(
-                """INSERT INTO conversations (id, roots, active_path)
-                   VALUES (?, '[]', '[]')
-                   ON CONFLICT(id) DO NOTHING""",
-                (conversation_id,),
-            )
-            self._conn.execute(
-                """INSERT INTO conversation_settings (conversation_id, data)
-                   VALUES (?, ?)
-                   ON CONFLICT(conversation_id) DO UPDATE SET data = excluded.data""",
-                (conversation_id, blob),
-            )
-            self._conn.commit()
+        self._save_data("conversation_settings", conversation_id, settings)
 
     def load_variables(self, conversation_id: str) -> dict[str, Any]:
-        with self._lock:
-            row = self._conn.execute(
-                "SELECT data FROM conversation_variables WHERE conversation_id = ?",
-                (conversation_id,),
-            ).fetchone()
+        return self._load_data("conversation_variables", conversation_id)
+
+    def save_variables(self, conversation_id: str, variables: dict[str, Any]) -> None:
+        self._save_data("conversation_variables", conversation_id, variables)
+
+    # -- settings / variables (optionally write-coalesced) --
+
+    def _load_data(self, table: str, conversation_id: str) -> dict[str, Any]:
+        if self._write_delay > 0:
+            blob = self._pending[table].get(conversation_id)
+            if blob is not None:
+                return json_loads(blob)
+        with self._reading() as conn:
+            row = conn.execute(_SELECT_DATA_SQL[table], (conversation_id,)).fetchone()
         if row is None:
             return {}
-        return json.loads(row["data"])
+        return json_loads(_unpack_text(row["data"]))
 
-    def save_variables(self, conversation_id: str, variables: dict[str, Any]) -> None:
-        blob = json.dumps(variables, ensure_ascii=False)
+    def _save_data(self, table: str, conversation_id: str, data: dict[str, Any]) -> None:
+        # Serialized now, so later mutation of *data* by the caller can't leak into the write
+        blob = json_dumps(data)
+        if self._write_delay > 0:
+            with self._pending_lock:
+                self._pending[table][conversation_id] = blob
+                if self._flush_timer is None:
+                    timer = threading.Timer(self._write_delay, self.flush)
+                    timer.daemon = True
+                    timer.start()
+                    self._flush_timer = timer
+            return
+        packed = _pack_text(blob)
         with self._lock:
-            self._conn.execute(
-                """INSERT INTO conversations (id, roots, active_path)
-                   VALUES (?, '[]', '[]')
-                   ON CONFLICT(id) DO NOTHING""",
-                (conversation_id,),
-            )
-            self._conn.execute(
-                """INSERT INTO conversation_variables (conversation_id, data)
-                   VALUES (?, ?)
-                   ON CONFLICT(conversation_id) DO UPDATE SET data = excluded.data""",
-                (conversation_id, blob),
-            )
-            self._conn.commit()
+            self._conn.execute(_UPSERT_DATA_SQL[table], (conversation_id, packed))
+            self._commit()
+
+    def flush(self) -> None:
+        """Write all buffered settings/variables in one transaction (no-op without *write_delay*)."""
+        with self._flush_lock:
+            with self._pending_lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                batches = {table: dict(pending) for table, pending in self._pending.items() if pending}
+            if not batches:
+                return
+            packed = {table: [(cid, _pack_text(blob)) for cid, blob in rows.items()] for table, rows in batches.items()}
+            with self._lock, self._write_txn():
+                for table, rows in packed.items():
+                    self._conn.executemany(_UPSERT_DATA_SQL[table], rows)
+            # A flush marks the end of a burst of saves: a good idle moment to checkpoint
+            self.checkpoint()
+            # Entries stay visible to loads until written; drop only those not re-saved meanwhile
+            with self._pending_lock:
+                for table, rows in batches.items():
+                    pending = self._pending[table]
+                    for cid, blob in rows.items():
+                        if pending.get(cid) is blob:
+                            del pending[cid]
+
+    def close(self) -> None:
+        if self._write_delay > 0:
+            self.flush()
+            atexit.unregister(self.flush)
+        super().close()
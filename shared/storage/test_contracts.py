@@ -2,39 +2,96 @@
 
 from __future__ import annotations
 
+import contextlib
+import json
+import math
+import shutil
+import sqlite3
+from collections.abc import Callable
+from functools import partial
 from pathlib import Path
 
 import pytest
 
-from shared.storage.base import CatalogStore, ConversationStore
+from shared.storage.base import CatalogStore, ConversationStore, canonical_json
 from shared.storage.json_backend import JsonCatalogStore, JsonConversationStore
-from shared.storage.sqlite_backend import SqliteCatalogStore, SqliteConversationStore
+from shared.storage.sqlite_backend import SqliteCatalogStore, SqliteConversationStore, get_shared_conn
 
 # ---------------------------------------------------------------------------
 # Fixtures
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture(params=["json", "sqlite"])
-def catalog_store(request, tmp_path: Path) -> CatalogStore:
+# Stores are built once per module and backend (the SQLite schema setup dominates a
+# fresh store), emptied before every test and closed at module teardown (JSON stores
+# hold nothing to close). Their directories contain characters that are special in
+# SQLite URIs ('#', '%'), which read-only opens must escape.
+
+# Every entity type the catalog tests write to
+_ENTITY_TYPES = ("presets", "characters")
+
+_CONVERSATION_TABLES = ("conversation_nodes", "conversation_settings", "conversation_variables", "conversations")
+
+
+def _reset_catalog(store: CatalogStore) -> None:
+    for entity_type in _ENTITY_TYPES:
+        for item in store.list_items(entity_type):
+            store.delete_item(entity_type, item["folder_name"])
+
+
+def _reset_sqlite_conversations(store: SqliteConversationStore, db_path: Path) -> None:
+    # flush() writes buffered saves (and disarms the flush timer) so nothing lands after the reset
+    store.flush()
+    with contextlib.closing(sqlite3.connect(db_path)) as conn, conn:
+        for table in _CONVERSATION_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+
+
+@pytest.fixture(params=["json", "sqlite"], scope="module")
+def _catalog_backend(request, tmp_path_factory) -> CatalogStore:
+    tmp_path = tmp_path_factory.mktemp(f"catalog-{request.param}-#%41")
     data_root = tmp_path / "data"
     data_root.mkdir()
     if request.param == "json":
         return JsonCatalogStore(data_root)
     if request.param == "sqlite":
-        return SqliteCatalogStore(tmp_path / "test.db")
+        store = SqliteCatalogStore(tmp_path / "test.db")
+        request.addfinalizer(store.close)
+        return store
     raise ValueError(f"Unknown backend: {request.param}")
 
 
-@pytest.fixture(params=["json", "sqlite"])
-def conversation_store(request, tmp_path: Path) -> ConversationStore:
+@pytest.fixture(params=["json", "sqlite", "sqlite-coalesced"], scope="module")
+def _conversation_backend(request, tmp_path_factory) -> tuple[ConversationStore, Callable[[], None]]:
+    """(store, reset) — *reset* empties the store."""
+    tmp_path = tmp_path_factory.mktemp(f"conversation-{request.param}-#%41")
     data_root = tmp_path / "data"
     data_root.mkdir()
     if request.param == "json":
-        return JsonConversationStore(data_root)
+        return JsonConversationStore(data_root), partial(shutil.rmtree, data_root / "conversations", ignore_errors=True)
+    db_path = tmp_path / "test.db"
     if request.param == "sqlite":
-        return SqliteConversationStore(tmp_path / "test.db")
-    raise ValueError(f"Unknown backend: {request.param}")
+        store = SqliteConversationStore(db_path)
+    elif request.param == "sqlite-coalesced":
+        # Long delay: buffered writes only reach the database through flush()/close()
+        store = SqliteConversationStore(db_path, write_delay=60)
+    else:
+        raise ValueError(f"Unknown backend: {request.param}")
+    request.addfinalizer(store.close)
+    return store, partial(_reset_sqlite_conversations, store, db_path)
+
+
+@pytest.fixture
+def catalog_store(_catalog_backend: CatalogStore) -> CatalogStore:
+    _reset_catalog(_catalog_backend)
+    return _catalog_backend
+
+
+@pytest.fixture
+def conversation_store(_conversation_backend: tuple[ConversationStore, Callable[[], None]]) -> ConversationStore:
+    store, reset = _conversation_backend
+    reset()
+    return store
 
 
 # ---------------------------------------------------------------------------
@@ -79,12 +136,64 @@ class TestCatalogStoreContract:
         assert got is not None
         assert got["v"] == 2
 
+    def test_list_summary_fields(self, catalog_store: CatalogStore):
+        catalog_store.save_item("presets", "A", {"name": "Alpha", "description": {"zh": "说明"}})
+        catalog_store.save_item("presets", "B", {"description": None})
+        a, b = catalog_store.list_items("presets")
+        assert (a["name"], a["description"]) == ("Alpha", {"zh": "说明"})
+        assert (b["name"], b["description"]) == ("B", None)
+
+    def test_list_reflects_overwrite(self, catalog_store: CatalogStore):
+        catalog_store.save_item("presets", "X", {"name": "X", "description": "old"})
+        assert catalog_store.list_items("presets")[0]["description"] == "old"
+        catalog_store.save_item("presets", "X", {"name": "X", "description": "new"})
+        assert catalog_store.list_items("presets")[0]["description"] == "new"
+        catalog_store.delete_item("presets", "X")
+        assert catalog_store.list_items("presets") == []
+
     def test_multiple_entity_types(self, catalog_store: CatalogStore):
         catalog_store.save_item("presets", "A", {"name": "A"})
         catalog_store.save_item("characters", "B", {"name": "B"})
         assert len(catalog_store.list_items("presets")) == 1
         assert len(catalog_store.list_items("characters")) == 1
 
+    def test_iter_items_full(self, catalog_store: CatalogStore):
+        catalog_store.save_item("presets", "B", {"name": "B", "content": [1, 2]})
+        catalog_store.save_item("presets", "A", {"name": "A"})
+        assert list(catalog_store.iter_items_full("presets")) == [
+            ("A", {"name": "A"}),
+            ("B", {"name": "B", "content": [1, 2]}),
+        ]
+        assert list(catalog_store.iter_items_full("characters")) == []
+
+    def test_bulk_save_items(self, catalog_store: CatalogStore):
+        catalog_store.save_item("presets", "A", {"name": "A", "v": 1})
+        rows = [("A", {"name": "A", "v": 2}), ("B", {"name": "B"})]
+        assert catalog_store.bulk_save_items("presets", iter(rows)) == 2
+        assert catalog_store.get_item("presets", "A") == {"name": "A", "v": 2}
+        assert catalog_store.get_item("presets", "B") == {"name": "B"}
+        assert catalog_store.bulk_save_items("presets", []) == 0
+
+    def test_bulk_writes(self, catalog_store: CatalogStore):
+        with catalog_store.bulk_writes():
+            catalog_store.save_item("presets", "A", {"name": "A"})
+            catalog_store.save_item("presets", "B", {"name": "B"})
+            assert catalog_store.get_item("presets", "A") == {"name": "A"}
+        assert sorted(i["name"] for i in catalog_store.list_items("presets")) == ["A", "B"]
+
+    def test_non_finite_float(self, catalog_store: CatalogStore):
+        catalog_store.save_item("presets", "N", {"name": "N", "description": "d", "temperature": float("nan")})
+        catalog_store.save_item("presets", "M", {"name": "M", "top_p": float("inf")})
+        items = catalog_store.list_items("presets")
+        assert [(i["name"], i.get("description")) for i in sorted(items, key=lambda i: i["name"])] == [
+            ("M", None),
+            ("N", "d"),
+        ]
+        got = catalog_store.get_item("presets", "N")
+        assert got is not None
+        assert math.isnan(got["temperature"])
+        assert catalog_store.get_item("presets", "M") == {"name": "M", "top_p": float("inf")}
+
 
 # ---------------------------------------------------------------------------
 # ConversationStore contracts
@@ -130,6 +239,25 @@ class TestConversationStoreContract:
         assert got["score"] == 42
         assert got["nested"]["a"] == 1
 
+    def test_non_ascii_roundtrip(self, conversation_store: ConversationStore):
+        variables = {"名字": "小明", "emoji": "😀", "big": 2**70}
+        conversation_store.save_variables("conv1", variables)
+        assert conversation_store.load_variables("conv1") == variables
+
+    def test_large_values_roundtrip(self, conversation_store: ConversationStore):
+        long_text = "很长的消息 " * 200
+        doc = {
+            "roots": ["n1"],
+            "nodes": {"n1": {"pid": None, "role": "user", "content": long_text}},
+            "children": {},
+            "active_path": ["n1"],
+        }
+        conversation_store.save_doc("conv1", doc)
+        assert conversation_store.load_doc("conv1") == doc
+        variables = {"log": [long_text] * 3}
+        conversation_store.save_variables("conv1", variables)
+        assert conversation_store.load_variables("conv1") == variables
+
     def test_overwrite_doc(self, conversation_store: ConversationStore):
         conversation_store.save_doc("conv1", {"roots": ["a"], "nodes": {}, "children": {}, "active_path": []})
         conversation_store.save_doc("conv1", self.SAMPLE_DOC)
@@ -169,3 +297,101 @@ class TestConversationStoreContract:
         got = conversation_store.load_doc("conv_order")
         assert got is not None
         assert got["children"]["n1"] == ["n3", "n2", "n4"]
+
+    def test_resave_applies_node_changes(self, conversation_store: ConversationStore):
+        conversation_store.save_doc("conv1", self.SAMPLE_DOC)
+        doc = {
+            "roots": ["n1"],
+            "nodes": {
+                "n1": {"pid": None, "role": "system", "content": "hello", "pinned": True},
+                "n3": {"pid": "n1", "role": "user", "content": "new"},
+            },
+            "children": {"n1": ["n3"]},
+            "active_path": ["n1", "n3"],
+        }
+        conversation_store.save_doc("conv1", doc)
+        assert conversation_store.load_doc("conv1") == doc
+
+    def test_canonical_doc_bytes(self, conversation_store: ConversationStore):
+        assert conversation_store.canonical_doc_bytes("ghost") is None
+        conversation_store.save_doc("conv1", self.SAMPLE_DOC)
+        assert conversation_store.canonical_doc_bytes("conv1") == canonical_json(self.SAMPLE_DOC)
+
+    def test_bulk_writes(self, conversation_store: ConversationStore):
+        with conversation_store.bulk_writes():
+            conversation_store.save_doc("c1", self.SAMPLE_DOC)
+            conversation_store.save_settings("c1", {"k": 1})
+            conversation_store.save_variables("c2", {"v": 2})
+        got = conversation_store.load_doc("c1")
+        assert got is not None
+        assert got["nodes"]["n2"]["content"] == "hi"
+        assert conversation_store.load_settings("c1") == {"k": 1}
+        assert conversation_store.load_variables("c2") == {"v": 2}
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        {"big": 1e16, "small": 1e-7, "tiny": 1e-5, "edge": 1e-4, "plain": 1.5},
+        {"nan": float("nan"), "inf": float("-inf")},
+        {"10": 1, "2": 2, "int_keys": {10: "a", 2: "b"}},
+        {"text": "中文 1e5 0.00001 null"},
+    ],
+)
+def test_canonical_json_matches_stdlib(obj):
+    # Digests are computed from canonical_json, so its bytes must not depend on whether orjson is installed
+    expected = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    assert canonical_json(obj) == expected
+
+
+def test_sqlite_coalesced_writes_flush(tmp_path: Path):
+    db = tmp_path / "test.db"
+    store = SqliteConversationStore(db, write_delay=60)
+    store.save_variables("c1", {"v": 1})
+    store.save_variables("c1", {"v": 2})
+    store.save_settings("c2", {"s": 1})
+    reader = SqliteConversationStore(db, read_only=True)
+    assert reader.load_variables("c1") == {}
+    store.flush()
+    assert reader.load_variables("c1") == {"v": 2}
+    assert reader.load_settings("c2") == {"s": 1}
+    store.save_variables("c1", {"v": 3})
+    store.close()
+    assert reader.load_variables("c1") == {"v": 3}
+    reader.close()
+
+
+def test_sqlite_path_with_uri_characters(tmp_path: Path):
+    db = tmp_path / "st a#b%41" / "test.db"
+    db.parent.mkdir()
+    store = SqliteConversationStore(db)
+    store.save_settings("c1", {"k": 1})
+    assert store.load_settings("c1") == {"k": 1}
+    reader = SqliteConversationStore(db, read_only=True)
+    assert reader.load_settings("c1") == {"k": 1}
+    reader.close()
+    store.close()
+
+
+def test_sqlite_stores_sharing_a_connection(tmp_path: Path):
+    db = tmp_path / "test.db"
+    conn = get_shared_conn(db)
+    catalog = SqliteCatalogStore(db, conn=conn)
+    conv = SqliteConversationStore(db, conn=conn)
+    # One transaction spans both stores: a write through one store inside the other's
+    # bulk_writes neither fails nor commits early, and an error rolls back both.
+    with pytest.raises(RuntimeError), catalog.bulk_writes():
+        catalog.save_item("presets", "A", {"name": "A"})
+        conv.save_settings("c1", {"k": 1})
+        raise RuntimeError
+    assert catalog.get_item("presets", "A") is None
+    assert conv.load_settings("c1") == {}
+    with catalog.bulk_writes():
+        catalog.save_item("presets", "A", {"name": "A"})
+        conv.save_settings("c1", {"k": 1})
+    catalog.close()
+    # The connection belongs to the caller: closing a store leaves it usable
+    assert conv.load_settings("c1") == {"k": 1}
+    conv.close()
+    assert conn.execute("SELECT count(*) FROM catalog_items").fetchone()[0] == 1
+    conn.close()
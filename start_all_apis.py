@@ -18,9 +18,9 @@ Notes:
 from __future__ import annotations
 
 import argparse
+import logging
+import logging.handlers
 import os
-import shutil
-import subprocess
 import sys
 from pathlib import Path
 
@@ -30,86 +30,253 @@ FRONTEND_DIR = REPO_ROOT / "frontend_projects" / "SmartTavern"
 FRONTEND_DIST = FRONTEND_DIR / "dist"
 
 
+# ---------------------------------------------------------------------------
+# Boot log: startup lines are buffered and written to stdout in one go right
+# before the server starts (errors flush immediately); afterwards they go straight out
+# ---------------------------------------------------------------------------
+
+
+class _BootFormatter(logging.Formatter):
+    _TAGS = {logging.WARNING: "WARN", logging.CRITICAL: "FATAL"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        return f"[{self._TAGS.get(record.levelno, record.levelname)}] {record.getMessage()}"
+
+
+_boot_stream = logging.StreamHandler(sys.stdout)
+_boot_stream.setFormatter(_BootFormatter())
+_boot_buffer = logging.handlers.MemoryHandler(capacity=256, flushLevel=logging.ERROR, target=_boot_stream)
+
+logger = logging.getLogger("smarttavern.boot")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+logger.addHandler(_boot_buffer)
+
+
+def _flush_boot_log() -> None:
+    """把缓冲的启动日志一次性写出，之后的日志直接输出。"""
+    if _boot_buffer not in logger.handlers:
+        return
+    logger.removeHandler(_boot_buffer)
+    records, _boot_buffer.buffer = _boot_buffer.buffer, []
+    if records:
+        sys.stdout.write("".join(_boot_stream.format(r) + "\n" for r in records))
+        sys.stdout.flush()
+    logger.addHandler(_boot_stream)
+
+
+# (name, absolute path) of the frontend package runner, resolved on first use
+_runner: tuple[str, str] | None = None
+
+
+def _find_runner() -> tuple[str, str] | None:
+    """Resolve bun (preferred) or npm on PATH once; later builds reuse the absolute path."""
+    global _runner
+    if _runner is None:
+        import shutil
+
+        for cmd in ("bun", "npm"):
+            path = shutil.which(cmd)
+            if path:
+                _runner = (cmd, path)
+                break
+    return _runner
+
+
 def _build_frontend() -> None:
     """Auto-detect bun/npm and build frontend for production."""
-    runner = None
-    for cmd in ("bun", "npm"):
-        if shutil.which(cmd):
-            runner = cmd
-            break
-    if not runner:
-        print("[ERROR] Neither bun nor npm found. Install one to build frontend.")
+    # Only needed on the --serve build path, so imported here rather than at startup
+    import subprocess
+
+    found = _find_runner()
+    if not found:
+        logger.error("Neither bun nor npm found. Install one to build frontend.")
         sys.exit(1)
+    runner, runner_path = found
 
-    print(f"[INFO] Building frontend with {runner} ...")
-    subprocess.run([runner, "install"], cwd=str(FRONTEND_DIR), check=True)
-    subprocess.run([runner, "run", "build"], cwd=str(FRONTEND_DIR), check=True)
+    logger.info(f"Building frontend with {runner} ...")
+    # stdio is inherited (no capture), so no pipes are set up; the absolute path skips the PATH search
+    subprocess.run([runner_path, "install"], cwd=str(FRONTEND_DIR), check=True)
+    subprocess.run([runner_path, "run", "build"], cwd=str(FRONTEND_DIR), check=True)
 
     if not FRONTEND_DIST.exists():
-        print("[ERROR] Frontend build produced no output.")
+        logger.error("Frontend build produced no output.")
         sys.exit(1)
-    print(f"[INFO] Frontend built -> {FRONTEND_DIST}")
+    logger.info(f"Frontend built -> {FRONTEND_DIST}")
 
 
 def _enable_inproc_defaults() -> None:
     """默认开启 core 进程内直调（所有命名空间）。
     - 外部已显式设置时不覆盖（setdefault）。
     """
+    os.environ.setdefault("MF_INPROC", "1")
+    os.environ.setdefault("MF_INPROC_NS", "modules,workflow,plugins")
+
+
+def _configure_pycache_prefix() -> None:
+    """MF_PYCACHE_PREFIX 设置时把字节码集中写入一个目录（同 PYTHONPYCACHEPREFIX）。
+
+    取值为目录路径（相对路径基于仓库根目录），或 "1" 表示 .mf_pycache/。
+    同时写回 PYTHONPYCACHEPREFIX，使 --reload 派生的工作进程沿用同一目录；已显式设置时不覆盖。
+    """
+    prefix = os.environ.get("MF_PYCACHE_PREFIX")
+    if not prefix or sys.pycache_prefix:
+        return
+    path = REPO_ROOT / (".mf_pycache" if prefix == "1" else prefix)
+    sys.pycache_prefix = str(path.resolve())
+    os.environ.setdefault("PYTHONPYCACHEPREFIX", sys.pycache_prefix)
+
+
+def _read_pyc_tree(root: str) -> None:
+    fadvise = getattr(os, "posix_fadvise", None)
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if not name.endswith(".pyc"):
+                continue
+            try:
+                fd = os.open(os.path.join(dirpath, name), os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                if fadvise is not None:
+                    fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                else:
+                    while os.read(fd, 1 << 20):
+                        pass
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+
+def _prefetch_pycache() -> None:
+    """集中的 .pyc 目录在后台线程预读进页缓存（Linux 上用 posix_fadvise），与模块导入重叠进行。"""
+    if not sys.pycache_prefix or not os.path.isdir(sys.pycache_prefix):
+        return
+    import threading
+
+    threading.Thread(target=_read_pyc_tree, args=(sys.pycache_prefix,), name="pyc-prefetch", daemon=True).start()
+
+
+def _ensure_pyc_warm() -> None:
+    """首次启动时用多进程 compileall 预编译 api/ 下的 .pyc，之后由哨兵文件跳过。
+
+    之后的导入直接命中 __pycache__；个别文件改动仍由常规导入按需重新编译。
+    无论编译成败都写哨兵，编译失败的文件不会在每次启动时重试。
+    """
+    if sys.dont_write_bytecode:
+        return
+    # 字节码集中存放时哨兵随之放在该目录，换目录即重新预编译
+    cache_dir = Path(sys.pycache_prefix) if sys.pycache_prefix else REPO_ROOT / ".mf_cache"
+    sentinel = cache_dir / f"pyc-warm.{sys.implementation.cache_tag}"
+    if sentinel.exists():
+        return
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return
+    # .pyc 写不进去时编译只是白白耗时（只读部署），同样只做一次判断
+    api_dir = REPO_ROOT / "api"
+    if sys.pycache_prefix or os.access(api_dir, os.W_OK):
+        import compileall
+
+        try:
+            compileall.compile_dir(str(api_dir), quiet=2, workers=os.cpu_count() or 1)
+        except OSError:
+            pass
     try:
-        os.environ.setdefault("MF_INPROC", "1")
-        os.environ.setdefault("MF_INPROC_NS", "modules,workflow,plugins")
-    except Exception:
+        sentinel.touch()
+    except OSError:
         pass
 
 
+# 进程内只引导一次：重复调用 _bootstrap_gateway / create_app 复用已建好的网关与 app
+_gateway = None
+_gateway_config_file = None
+_app = None
+
+
 def _bootstrap_gateway(config_file=None):
-    """加载所有 API 模块、插件，创建并配置网关实例。
+    """加载所有 API 模块、插件，创建并配置网关实例（进程内只执行一次，之后返回同一网关）。
+
+    网关是进程内单例：已引导后再传入不同的 *config_file* 会抛 ValueError（不传则沿用已有网关）。
 
     启动顺序：
     0. validate storage backend config
     1. load_project_modules — 导入 api/ 下所有 .py，触发 @register_api
     2. load_backend_plugin_apis — 按 manifest 导入插件 API 模块
     3. initialize_plugins — 运行时 hook 注册（HookManager）
+
+    MF_DEFER_PLUGIN_INIT=1 时第 3 步改在网关创建后于后台线程执行（见 APIGateway.run_startup_in_background），
+    端口先行监听、健康检查立即可用，其余 API 请求等待其完成（MF_STARTUP_TIMEOUT 秒后返回 503）。
     """
+    global _gateway, _gateway_config_file
+    if _gateway is not None:
+        if config_file is not None and config_file != _gateway_config_file:
+            raise ValueError(
+                f"API gateway already bootstrapped with config_file={_gateway_config_file!r}; "
+                f"cannot switch to {config_file!r} in the same process"
+            )
+        return _gateway
+
     # 0) Storage backend validation
     from shared.storage import get_storage_backend
 
     backend = get_storage_backend()
     if backend not in ("json", "sqlite"):
-        print(f"[FATAL] Unknown STORAGE_BACKEND={backend!r}. Expected 'json' or 'sqlite'.")
+        logger.critical(f"Unknown STORAGE_BACKEND={backend!r}. Expected 'json' or 'sqlite'.")
         sys.exit(1)
-    print(f"[INFO] Storage backend: {backend}")
+    logger.info(f"Storage backend: {backend}")
 
     from core.services import service_manager
 
-    # 1) API 模块发现与注册
+    # 1) API 模块发现与注册（首次启动先并行预编译字节码，之后预读集中的字节码目录）
+    _ensure_pyc_warm()
+    _prefetch_pycache()
     imported = service_manager.load_project_modules()
-    print(f"[INFO] Imported {imported} backend modules under 'api/'.")
+    logger.info(f"Imported {imported} backend modules under 'api/'.")
 
-    # 2) 插件 manifest → API 模块导入
+    # 2) 插件 manifest → API 模块导入（MF_PLUGIN_WORKERS 在 try 之外解析，取值非法不应连带跳过全部插件）
+    try:
+        plugin_workers = int(os.environ.get("MF_PLUGIN_WORKERS", "8"))
+    except ValueError:
+        plugin_workers = 8
     try:
         from core.plugins_backend_loader import load_backend_plugin_apis
 
-        plug_res = load_backend_plugin_apis(manifest_only=True, project="SmartTavern")
-        print(
-            f"[INFO] Plugin backend loader: manifests={plug_res.manifests_read}, imported={len(plug_res.imported_modules)}, skipped={len(plug_res.skipped_entries)}"
+        plug_res = load_backend_plugin_apis(manifest_only=True, project="SmartTavern", max_workers=plugin_workers)
+        logger.info(
+            f"Plugin backend loader: manifests={plug_res.manifests_read}, imported={len(plug_res.imported_modules)}, skipped={len(plug_res.skipped_entries)}"
         )
     except Exception as e:
-        print(f"[WARN] Plugin backend loader failed: {type(e).__name__}: {e}")
+        logger.warning(f"Plugin backend loader failed: {type(e).__name__}: {e}")
 
     # 3) 运行时 hook 初始化
-    plugins_count = service_manager.initialize_plugins()
-    print(f"[INFO] Plugin hooks initialized: {plugins_count} plugin(s) loaded.")
+    def init_plugin_hooks():
+        plugins_count = service_manager.initialize_plugins()
+        logger.info(f"Plugin hooks initialized: {plugins_count} plugin(s) loaded.")
+
+    defer_hooks = os.environ.get("MF_DEFER_PLUGIN_INIT") == "1"
+    if not defer_hooks:
+        init_plugin_hooks()
 
     import core
 
     reg = core.get_registry()
-    print(f"[INFO] Registered API functions: {len(reg.list_functions())}")
+    logger.info(f"Registered API functions: {len(reg.list_functions())}")
 
     from core.api_gateway import get_api_gateway
 
-    gateway = get_api_gateway(config_file=config_file)
-    return gateway
+    _gateway = get_api_gateway(config_file=config_file)
+    _gateway_config_file = config_file
+    if defer_hooks:
+        try:
+            startup_timeout = float(os.environ.get("MF_STARTUP_TIMEOUT", "300"))
+        except ValueError:
+            logger.warning(f"Invalid MF_STARTUP_TIMEOUT={os.environ['MF_STARTUP_TIMEOUT']!r}, using 300 seconds.")
+            startup_timeout = 300.0
+        _gateway.run_startup_in_background(init_plugin_hooks, timeout=startup_timeout)
+    return _gateway
 
 
 def create_app():
@@ -117,7 +284,12 @@ def create_app():
     Uvicorn factory 模式入口。用于 --reload 时满足"以导入字符串传入应用"的要求。
     返回 FastAPI app 实例。
     """
+    global _app
+    if _app is not None:
+        return _app
+
     _enable_inproc_defaults()
+    _configure_pycache_prefix()
     gateway = _bootstrap_gateway()
 
     gateway.discover_and_register_functions()
@@ -126,11 +298,14 @@ def create_app():
     gateway._register_endpoints_to_fastapi()
     gateway.setup_spa_fallback()
 
-    return gateway.app
+    _flush_boot_log()
+    _app = gateway.app
+    return _app
 
 
 def main():
     _enable_inproc_defaults()
+    _configure_pycache_prefix()
     parser = argparse.ArgumentParser(description="Start all backend APIs (API Gateway)")
     parser.add_argument("--host", default="0.0.0.0", help="Bind host (default: 0.0.0.0)")
     parser.add_argument("--port", type=int, default=8050, help="Bind port (default: 8050)")
@@ -147,18 +322,19 @@ def main():
         if args.rebuild or not FRONTEND_DIST.exists():
             _build_frontend()
         else:
-            print(f"[INFO] Frontend dist exists: {FRONTEND_DIST} (add --rebuild to force)")
+            logger.info(f"Frontend dist exists: {FRONTEND_DIST} (add --rebuild to force)")
 
     if args.reload:
         # 使用导入字符串 + factory 模式，避免 uvicorn 的 reload 警告
         try:
             import uvicorn
         except ImportError:
-            print("❌ Missing dependency: uvicorn. Please `pip install uvicorn fastapi`")
+            logger.error("Missing dependency: uvicorn. Please `pip install uvicorn fastapi`")
             sys.exit(1)
 
         target = "start_all_apis:create_app"
-        print(f"[INFO] Starting API Gateway with reload on http://{args.host}:{args.port}")
+        logger.info(f"Starting API Gateway with reload on http://{args.host}:{args.port}")
+        _flush_boot_log()
         uvicorn.run(
             target, host=args.host, port=args.port, log_level="info", reload=True, factory=True, access_log=True
         )
@@ -175,19 +351,30 @@ def main():
         gateway.config.static_directory = str(FRONTEND_DIST)
         gateway.config.static_url_prefix = "/"
 
-    print(f"[INFO] Starting API Gateway on http://{args.host}:{args.port} (background={args.background}) ...")
+    logger.info(f"Starting API Gateway on http://{args.host}:{args.port} (background={args.background}) ...")
+    _flush_boot_log()
     gateway.start_server(background=args.background)
 
     if args.background:
-        print("[INFO] API server started in background. Press Ctrl+C to exit this launcher.")
-        try:
-            import time
-
-            while True:
-                time.sleep(3600)
-        except KeyboardInterrupt:
-            print("\n[INFO] Stop signal received. Shutting down gateway ...")
-            gateway.stop_server()
+        logger.info("API server started in background. Press Ctrl+C to exit this launcher.")
+        import signal
+        import threading
+
+        # SIGINT (Ctrl+C) / SIGTERM (docker stop) 都只置位事件，主线程空闲等待直至收到信号
+        stop = threading.Event()
+
+        def _request_stop(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGINT, _request_stop)
+        signal.signal(signal.SIGTERM, _request_stop)
+        # Windows 上无超时的 wait 期间信号处理函数得不到执行，故按秒轮询
+        timeout = 1.0 if sys.platform == "win32" else None
+        while not stop.wait(timeout):
+            pass
+        print()
+        logger.info("Stop signal received. Shutting down gateway ...")
+        gateway.stop_server()
     else:
         # 前台模式：uvicorn 在 start_server 中阻塞运行
         pass